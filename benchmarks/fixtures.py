@@ -0,0 +1,251 @@
+"""Synthetic battle profile and rules update PDFs for benchmarking.
+
+The generated documents follow the layouts the extractors expect: ruled tables with the
+headers determine_table_type recognises, and two-column Q:/A: pages split by a vertical
+rule for extract_text_from_columns. Output is deterministic for a given scale and seed.
+"""
+import os
+import json
+import random
+import zlib
+from pdfminer.fontmetrics import FONT_METRICS
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+HELVETICA_WIDTHS = FONT_METRICS["Helvetica"][1]
+FACTIONS = ["STORMCAST ETERNALS", "SERAPHON", "OGOR MAWTRIBES", "SKAVEN"]
+FACTION_PACKS = [("FLESH-EATER COURTS", "September"), ("SKAVEN", "March"), ("SERAPHON", "September")]
+KEYWORDS = ["Infantry", "Cavalry", "Monster", "Wizard", "Priest", "Unique", "Fly"]
+SECTIONS = ["CORE RULES", "BATTLE TACTICS", "SERAPHON"]
+
+def text_width(text, size):
+    return sum(HELVETICA_WIDTHS.get(c, 600) for c in text) * size / 1000
+
+def escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+class FixturePage:
+    """Content stream builder using top-left coordinates like pdfplumber."""
+    def __init__(self, width=PAGE_WIDTH, height=PAGE_HEIGHT):
+        self.width = width
+        self.height = height
+        self.ops = []
+
+    def text(self, x, top, text, size=8):
+        # Place every word separately like typeset PDFs do, so no space glyphs are emitted
+        y = self.height - top - size
+        for word in text.split(" "):
+            if word:
+                self.ops.append(f"BT /F1 {size} Tf 1 0 0 1 {x:.2f} {y:.2f} Tm ({escape(word)}) Tj ET")
+            x += text_width(word, size) + size * 0.5
+
+    def line(self, x0, top0, x1, top1, width=0.5):
+        self.ops.append(f"{width} w {x0:.2f} {self.height - top0:.2f} m {x1:.2f} {self.height - top1:.2f} l S")
+
+    def table(self, top, left, widths, rows, row_height=18):
+        """Draw a fully ruled table. Cells may contain newlines. Returns the bottom of the table."""
+        heights = [row_height * max(cell.count("\n") + 1 for cell in row) for row in rows]
+        right = left + sum(widths)
+        bottom = top + sum(heights)
+        y = top
+        self.line(left, y, right, y)
+        for height in heights:
+            y += height
+            self.line(left, y, right, y)
+        x = left
+        for width in [0] + widths:
+            x += width
+            self.line(x, top, x, bottom)
+        y = top
+        for row, height in zip(rows, heights):
+            x = left
+            for cell, width in zip(row, widths):
+                for i, text in enumerate(cell.split("\n")):
+                    self.text(x + 2, y + 3 + i * 9, text, size=7)
+                x += width
+            y += height
+        return bottom
+
+def write_pdf(path, pages, info=None):
+    """Write pages as a minimal PDF using the standard Helvetica font."""
+    objects = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>", None]
+    font_id, pages_id = 1, 2
+    kids = []
+    for page in pages:
+        content = zlib.compress("\n".join(page.ops).encode("cp1252"))
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content + b"\nendstream")
+        objects.append((
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {page.width} {page.height}] "
+            f"/Contents {len(objects)} 0 R /Resources << /Font << /F1 {font_id} 0 R >> >> >>"
+        ).encode())
+        kids.append(len(objects))
+    objects[pages_id - 1] = f"<< /Type /Pages /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] /Count {len(kids)} >>".encode()
+    objects.append(f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode())
+    trailer = f"/Root {len(objects)} 0 R"
+    if info:
+        objects.append(("<< " + " ".join(f"/{key} ({escape(value)})" for key, value in info.items()) + " >>").encode())
+        trailer += f" /Info {len(objects)} 0 R"
+    trailer = f"/Size {len(objects) + 1} " + trailer
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += f"trailer\n<< {trailer} >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+def page_header(page, subtitle, title):
+    # The battle profile extractor takes the fourth text line outside tables as the page title
+    page.text(40, 20, "WARHAMMER AGE OF SIGMAR")
+    page.text(40, 35, "BATTLE PROFILES")
+    page.text(40, 50, subtitle)
+    page.text(40, 65, title)
+
+def battle_profile_page(rng, faction, month, index):
+    page = FixturePage()
+    page_header(page, f"Updated {month} 2025", faction)
+    # Struck out text is removed before table extraction
+    page.text(300, 50, "OLDTEXT")
+    page.line(298, 54, 340, 54)
+
+    prefix = faction.split()[0].title()
+    widths = [110, 45, 45, 120, 140, 60]
+    heroes = [["HEROES", "UNIT SIZE", "POINTS", "REGIMENT OPTIONS", "NOTES", "BASE SIZE"]]
+    for i in range(4):
+        heroes.append([
+            f"{prefix} Lord {index}{i}" + (", the Bold" if i == 0 else ""),
+            "1",
+            f"{100 + 10 * i}",
+            rng.choice([f"Any {prefix}", f"0-1 {prefix} Knight {index}0", "None", "Any Infantry or Any Cavalry",
+                        "1 Sub Hero (required)", "0-1 non-Unique Infantry"]),
+            rng.choice(["This Hero can join an eligible regiment as a\nSub Hero.",
+                        "This unit cannot be reinforced.",
+                        f"You cannot include this unit and\n{prefix} Lord {index}1 in the same army.",
+                        "This unit will move to Warhammer\nLegends on 1 May 2026.",
+                        "Something odd."]),
+            "40mm",
+        ])
+    bottom = page.table(90, 30, widths, heroes)
+
+    units = [["UNITS", "UNIT SIZE", "POINTS", "RELEVANT KEYWORDS", "NOTES", "BASE SIZE"]]
+    for i in range(4):
+        units.append([
+            f"{prefix} Knight {index}{i}",
+            rng.choice(["5", "10", "3"]),
+            f"{120 + 5 * i} (+10)",
+            ", ".join(rng.sample(KEYWORDS, 2) + [prefix]),
+            rng.choice(["This unit can be reinforced.",
+                        f"You can include 1 unit of this type for each\n{prefix} Lord {index}0 in your army.",
+                        f"This unit can only be taken in\n{prefix} Lord {index}1's regiment.",
+                        ""]),
+            "32mm",
+        ])
+    bottom = page.table(bottom + 20, 30, widths, units)
+
+    other = [["TYPE", "NAME", "POINTS", "NOTES"]]
+    for i in range(3):
+        other.append([rng.choice(["Manifestation Lore", "Spell Lore", "Faction Terrain"]), f"{prefix} Thing {index}{i}", str(20 * i), "-"])
+    page.table(bottom + 20, 30, [120, 160, 60, 180], other)
+    return page
+
+def shared_pages():
+    regiments = FixturePage()
+    # The main document's date makes older faction packs (the March one) get skipped
+    page_header(regiments, "Updated June 2025", "REGIMENTS OF RENOWN")
+    regiments.table(90, 30, [120, 160, 60, 180], [
+        ["Big Band", "• 1 Gatebreaker\n• 2 Gnoblars", "250", "Allowed: ORDER, KHAOS"],
+        ["Other Band", "• 1 Foo Bar", "180", "Allowed: SERAPHON"],
+    ])
+    manifestations = FixturePage()
+    page_header(manifestations, "Pitched battles", "UNIVERSAL MANIFESTATIONS")
+    manifestations.table(90, 30, [200, 60, 200], [
+        ["NAME", "POINTS", "NOTES"],
+        ["Krondspine", "20", "-"],
+        ["Forbidden Power", "30", "-"],
+    ])
+    # Rules text without tables, skipped by page triage
+    rules = FixturePage()
+    page_header(rules, "Pitched battles", "HOW TO USE BATTLE PROFILES")
+    for i in range(40):
+        rules.text(40, 90 + 15 * i, "Each unit has a points value that is paid when it is added to your army.")
+    # Ruled but without battle profile headers, also skipped
+    contents = FixturePage()
+    page_header(contents, "Pitched battles", "CONTENTS")
+    contents.table(90, 30, [200, 60], [[faction, str(3 + i)] for i, faction in enumerate(FACTIONS)])
+    return [regiments, manifestations, rules, contents]
+
+def write_battle_profile_fixtures(pdf_dir, scale=1, seed=1):
+    """Write battle_profiles.pdf and faction pack PDFs with `scale` pages per faction."""
+    rng = random.Random(seed)
+    os.makedirs(pdf_dir, exist_ok=True)
+    pages = shared_pages()
+    for index in range(scale):
+        for faction in FACTIONS:
+            pages.append(battle_profile_page(rng, faction, "June", index))
+    write_pdf(os.path.join(pdf_dir, "battle_profiles.pdf"), pages, {"CreationDate": "D:20250601120000"})
+    for i, (faction, month) in enumerate(FACTION_PACKS):
+        pages = [battle_profile_page(rng, faction, month, 100 + 10 * i + index) for index in range(scale)]
+        filename = f"faction_{faction.lower().replace(' ', '_')}_battle_profiles.pdf"
+        write_pdf(os.path.join(pdf_dir, filename), pages)
+
+def faq_page(rng, section, number, with_faq=True):
+    page = FixturePage()
+    page.text(40, 20, "WARHAMMER AGE OF SIGMAR")
+    page.text(40, 35, "FREQUENTLY ASKED QUESTIONS" if number % 2 else "RULES UPDATES")
+    page.text(40, 50, "The following are answers")
+    page.text(40, 65, section)
+    # Column divider, plus a short decorative rule that must not be picked as the column box
+    page.line(297, 95, 297, 790)
+    page.line(100, 300, 100, 380)
+    for column, x in enumerate((40, 310)):
+        top = 100
+        for rule in range(3):
+            if not with_faq:
+                page.text(x, top, "Plain rules text here.")
+                top += 20
+                continue
+            page.text(x, top, f"RULE {number} {column} {rule}" + (" LONG" if rule == 1 else ""))
+            top += 10
+            if rule == 1:
+                page.text(x, top, "CONTINUED TITLE")
+                top += 10
+            page.text(x, top, f"Q: Can unit {number}{column}{rule} do the thing")
+            page.text(x, top + 10, "while “quoted” — dashed?")
+            page.text(x, top + 20, f"A: Yes, {rng.randint(1, 99)} times.")
+            page.text(x, top + 30, "More answer text.")
+            top += 50
+    page.text(280, 810, str(number))
+    return page
+
+def write_faq_fixture(pdf_dir, scale=1, seed=2):
+    """Write rules_update.pdf with a cover page and 4 * scale FAQ pages."""
+    rng = random.Random(seed)
+    os.makedirs(pdf_dir, exist_ok=True)
+    pages = [faq_page(rng, "COVER", 0, with_faq=False)]
+    for number in range(1, 4 * scale + 1):
+        pages.append(faq_page(rng, SECTIONS[number % 3] if number % 2 else "CORE RULES", number))
+    write_pdf(os.path.join(pdf_dir, "rules_update.pdf"), pages, {"CreationDate": "D:20250704"})
+
+def write_overlay_fixtures(overlay_dir, scale=1):
+    """Write overlays that override, append and delete entries across the fixture factions."""
+    os.makedirs(overlay_dir, exist_ok=True)
+    for i, faction in enumerate(FACTIONS):
+        prefix = faction.split()[0].title()
+        profiles = []
+        for index in range(scale):
+            profiles.append({"name": f"{prefix} Knight {index}0", "unit_size": "5", "points": 999})
+            profiles.append({"name": f"{prefix} Overlay Unit {index}", "unit_size": "1", "points": 50})
+            profiles.append({"name": f"{prefix} Knight {index}3", "action": "delete"})
+        with open(os.path.join(overlay_dir, f"overlay_{i}.json"), "w") as f:
+            json.dump({"factions": [{"name": faction, "battle_profiles": profiles}]}, f)
+
+def write_fixtures(pdf_dir, scale=1):
+    write_battle_profile_fixtures(pdf_dir, scale)
+    write_faq_fixture(pdf_dir, scale)
+    write_overlay_fixtures(os.path.join(pdf_dir, "overlays"), scale)
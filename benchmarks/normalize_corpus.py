@@ -0,0 +1,107 @@
+"""Checks that normalize_text and extract_points give the same output as the original
+chained-replace implementation.
+
+The corpus is every BMP code point on its own, the text of the benchmark fixtures, and
+random mixes of ASCII, tags and the characters the normalization special-cases:
+
+    python -m benchmarks.normalize_corpus --fixtures-dir .cache/bench_fixtures/scale_1
+"""
+import os
+import re
+import sys
+import random
+import argparse
+import unicodedata
+import pdfplumber
+from extractors.utils import normalize_text, extract_points
+
+# The original implementations, kept as the reference
+def reference_normalize_text(text):
+    # replace tags
+    text = text.replace("NEW", "")
+    text = text.replace("UPDATED", "")
+
+    # Replace common problematic unicode characters
+    replacements = {
+        "\ufffd": ".",
+        "“": '"',
+        "”": '"',
+        "‘": "'",
+        "’": "'",
+        "-": "-",
+        "✹": "",
+        "á": "a",
+    # emdash to dash
+        "—": "-",
+        "‑": "-",
+        "-": "-",
+        "…": "...",
+        "\u00d7": "x",
+        "\u2739": "",
+        "’": "'",
+        "‑": "-",
+    }
+    ntext = text
+    for k, v in replacements.items():
+        ntext = ntext.replace(k, v)
+    # Normalize to NFKD and encode to ASCII, ignoring errors
+    # Instead of "ignore", you can use "replace" to show a replacement character (usually '?')
+    ntext = unicodedata.normalize("NFKD", ntext).encode("ascii", "ignore").decode("ascii")
+    # if "?" in ntext:
+    #     print(f"Warning: Some characters were replaced with '?' in: {text}")
+    return ntext.strip()
+
+def reference_extract_points(text):
+    # Always convert to an integer, return 0 if not possible
+    try:
+        # capture x (+|- y) we always want x
+        match = re.match(r"[-+]?\d+", reference_normalize_text(text))
+        return int(match.group(0)) if match else 0
+    except Exception:
+        return 0
+
+SPECIAL = "\ufffd\u201c\u201d\u2018\u2019\u2011\u2014\u2026\u00d7\u2739\u00e1\u00e9\u00fc\u00a0\u00a9\u00bd\u2122\u3000 \t\n"
+PIECES = ["NEW", "UPDATED", "NE", "W", "UPDATE", "D", "10", "+5", "-", " ", "Saurus", "(required)"]
+
+def fixture_strings(fixtures_dir):
+    strings = []
+    for name in sorted(os.listdir(fixtures_dir)):
+        if name.endswith(".pdf"):
+            with pdfplumber.open(os.path.join(fixtures_dir, name)) as pdf:
+                for page in pdf.pages:
+                    strings.extend(page.extract_text().split("\n"))
+                    for table in page.extract_tables():
+                        strings.extend(cell for row in table for cell in row if cell)
+    return strings
+
+def corpus(fixtures_dir=None, samples=100000, seed=0):
+    strings = [chr(c) for c in range(0x10000) if not 0xD800 <= c <= 0xDFFF]
+    if fixtures_dir:
+        strings.extend(fixture_strings(fixtures_dir))
+    r = random.Random(seed)
+    alphabet = [chr(c) for c in range(32, 127)] + list(SPECIAL) + PIECES
+    for _ in range(samples):
+        strings.append("".join(r.choice(alphabet) for _ in range(r.randint(0, 12))))
+    return strings
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare normalize_text with the reference implementation")
+    parser.add_argument("--fixtures-dir", help="Also check the text of the PDFs in this directory")
+    parser.add_argument("--samples", type=int, default=100000, help="Random strings to check")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    strings = corpus(args.fixtures_dir, args.samples, args.seed)
+    mismatches = 0
+    for text in strings:
+        # twice, so cached results are compared as well
+        for _ in range(2):
+            if normalize_text(text) != reference_normalize_text(text) or extract_points(text) != reference_extract_points(text):
+                mismatches += 1
+                if mismatches <= 10:
+                    print(f"Mismatch for {text!r}: {normalize_text(text)!r} != {reference_normalize_text(text)!r}")
+    print(f"Checked {len(strings)} strings, {mismatches} mismatches")
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Offline benchmarks for the extraction pipeline.
+
+Generates synthetic fixture PDFs at several scales, then records wall time, CPU time and
+peak traced memory for the main pipeline stages. Results are written as JSON so runs on
+different commits can be compared:
+
+    python -m benchmarks.run_benchmarks --output bench_results.json
+    python -m benchmarks.run_benchmarks --baseline bench_results.json --output new_results.json
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import shutil
+import platform
+import tempfile
+import subprocess
+import contextlib
+import tracemalloc
+from datetime import datetime
+import pdfplumber
+from benchmarks.fixtures import write_fixtures
+from extractors.battle_profile_extractor import BPExtractor, extract_battle_profile_data, load_bp_documents, document_date
+from extractors.faq_extractor import extract_faq_data
+from extractor import merge_overlays
+from output_writer import json_encoder, write_json
+
+DEFAULT_SCALES = [1, 10, 100]
+DEFAULT_FIXTURES_DIR = os.path.join(".cache", "bench_fixtures")
+DEFAULT_TOLERANCE = 0.25
+
+def fixtures_for_scale(fixtures_dir, scale, regenerate=False):
+    pdf_dir = os.path.join(fixtures_dir, f"scale_{scale}")
+    if regenerate or not os.path.exists(os.path.join(pdf_dir, "rules_update.pdf")):
+        print(f"Generating {scale}x fixtures in {pdf_dir}")
+        write_fixtures(pdf_dir, scale)
+    return pdf_dir
+
+def page_count(pdf_paths):
+    total = 0
+    for pdf_path in pdf_paths:
+        with pdfplumber.open(pdf_path) as pdf:
+            total += len(pdf.pages)
+    return total
+
+def measure(run, setup=None, repeat=1, memory=True):
+    """Time run(*setup()) `repeat` times and optionally trace its peak memory in one extra pass.
+
+    setup is called before every pass and is not measured, so stages that mutate their input
+    can be measured on fresh data each time.
+    """
+    setup = setup or (lambda: ())
+    wall = cpu = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            args = setup()
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            run(*args)
+            run_wall, run_cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        if wall is None or run_wall < wall:
+            wall, cpu = run_wall, run_cpu
+    result = {"wall_s": round(wall, 4), "cpu_s": round(cpu, 4)}
+    if memory:
+        with contextlib.redirect_stdout(io.StringIO()):
+            args = setup()
+            tracemalloc.start()
+            run(*args)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        result["peak_mb"] = round(peak / (1024 * 1024), 2)
+    return result
+
+def unfinalized_extractor(documents):
+    """Replay parsed documents into a BPExtractor, skipping stale faction packs like the pipeline does."""
+    extractor = BPExtractor()
+    main_document, faction_documents = documents[0], documents[1:]
+    main_date = document_date(main_document)
+    extractor.process_document(main_document)
+    for document in faction_documents:
+        date = document_date(document)
+        if main_date and date and date < main_date:
+            continue
+        extractor.process_document(document)
+    return extractor
+
+def benchmark_scale(pdf_dir, scale, repeat=1, memory=True):
+    rules_update_path = os.path.join(pdf_dir, "rules_update.pdf")
+    bp_paths = [os.path.join(pdf_dir, "battle_profiles.pdf")] + sorted(
+        os.path.join(pdf_dir, name) for name in os.listdir(pdf_dir) if name.startswith("faction_") and name.endswith(".pdf")
+    )
+    overlays_dir = os.path.join(pdf_dir, "overlays")
+    bp_pages = page_count(bp_paths)
+    faq_pages = page_count([rules_update_path])
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        documents = load_bp_documents(bp_paths)
+        battle_profiles = extract_battle_profile_data(pdf_dir)
+    serialized_documents = json.dumps(documents)
+    serialized_profiles = json_encoder().encode(battle_profiles)
+    output_dir = tempfile.mkdtemp(prefix="bench_output_")
+
+    def open_rules_update():
+        pdf = pdfplumber.open(rules_update_path)
+        return (pdf,)
+
+    def faq_run(pdf):
+        with pdf:
+            extract_faq_data(pdf.pages)
+
+    stages = [
+        ("extract_battle_profile_data", bp_pages, lambda: extract_battle_profile_data(pdf_dir), None),
+        ("extract_faq_data", faq_pages, faq_run, open_rules_update),
+        ("BPExtractor.finalize", bp_pages, lambda extractor: extractor.finalize(),
+         lambda: (unfinalized_extractor(json.loads(serialized_documents)),)),
+        ("merge_overlays", bp_pages, lambda data: merge_overlays(overlays_dir, data),
+         lambda: (json.loads(serialized_profiles),)),
+        ("write_json battleprofile.json", bp_pages,
+         lambda: write_json(os.path.join(output_dir, "battleprofile.json"), {"type": "battleprofile", "data": battle_profiles}), None),
+    ]
+    results = []
+    for name, pages, run, setup in stages:
+        print(f"  {name} ({scale}x, {pages} pages)")
+        result = {"benchmark": name, "scale": scale, "pages": pages}
+        result.update(measure(run, setup, repeat=repeat, memory=memory))
+        results.append(result)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, tolerance):
+    """Print wall time ratios against a baseline run and return the regressions."""
+    previous = {(r["benchmark"], r["scale"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get((result["benchmark"], result["scale"]))
+        if not before or not before["wall_s"]:
+            continue
+        ratio = result["wall_s"] / before["wall_s"]
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions.append(result)
+        print(f"{result['benchmark']:<30} {result['scale']:>4}x  {before['wall_s']:>9.3f}s -> {result['wall_s']:>9.3f}s  x{ratio:.2f}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the extraction pipeline on generated fixture PDFs.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="Fixture sizes to benchmark.")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per stage; the fastest is recorded.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass that records peak memory.")
+    parser.add_argument("--fixtures-dir", type=str, default=DEFAULT_FIXTURES_DIR, help="Where generated fixture PDFs are kept.")
+    parser.add_argument("--regenerate", action="store_true", help="Regenerate fixture PDFs even if they exist.")
+    parser.add_argument("--output", type=str, default="bench_results.json", help="File to write the JSON results to.")
+    parser.add_argument("--baseline", type=str, help="Earlier results file to compare against.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed wall time slowdown before a stage counts as a regression.")
+    args = parser.parse_args()
+
+    results = []
+    for scale in args.scales:
+        pdf_dir = fixtures_for_scale(args.fixtures_dir, scale, regenerate=args.regenerate)
+        print(f"Benchmarking {scale}x fixtures")
+        results.extend(benchmark_scale(pdf_dir, scale, repeat=args.repeat, memory=not args.no_memory))
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
 class BattleProfileRenderer {
     constructor() {
+        // index.json lists the factions and their shards; shards are fetched on demand
         this.data = null;
+        this.common = null;
+        this.factions = {};
+    }
+
+    async fetchJson(path) {
+        const response = await fetch(`data/${path}`);
+        return await response.json();
     }
 
     async loadData() {
         try {
-            const response = await fetch('data/battleprofile.json');
-            this.data = await response.json();
+            this.data = await this.fetchJson('battleprofile/index.json');
             return this.data;
         } catch (error) {
             console.error('Error loading battle profile data:', error);
@@ -14,27 +21,38 @@ class BattleProfileRenderer {
         }
     }
 
-    renderUniversalManifestations() {
-        if (!this.data || !this.data.data || !this.data.data.universal_manifestations) {
-            return '<p>No Universal Manifestations data available.</p>';
+    async loadCommon() {
+        if (!this.common && this.data) {
+            try {
+                this.common = await this.fetchJson(this.data.common.path);
+            } catch (error) {
+                console.error('Error loading battle profile data:', error);
+            }
         }
+        return this.common;
+    }
 
-        const manifestations = this.data.data.universal_manifestations;
-
-        // Sort manifestations by points (descending) then by name (alphabetically)
-        const sortedManifestations = manifestations.sort((a, b) => {
-            const pointsA = a.points !== undefined ? a.points : 0;
-            const pointsB = b.points !== undefined ? b.points : 0;
-
-            if (pointsA !== pointsB) {
-                return pointsB - pointsA; // Sort by points descending (highest first)
+    async loadFaction(armyName) {
+        if (!this.factions[armyName] && this.data) {
+            const entry = this.data.factions.find(f => f.name === armyName);
+            if (entry) {
+                try {
+                    this.factions[armyName] = await this.fetchJson(entry.path);
+                } catch (error) {
+                    console.error(`Error loading battle profiles for ${armyName}:`, error);
+                }
             }
+        }
+        return this.factions[armyName];
+    }
 
-            // If points are equal, sort alphabetically by name
-            const nameA = (a.name || '').toLowerCase();
-            const nameB = (b.name || '').toLowerCase();
-            return nameA.localeCompare(nameB);
-        });
+    renderUniversalManifestations() {
+        if (!this.common || !this.common.universal_manifestations) {
+            return '<p>No Universal Manifestations data available.</p>';
+        }
+
+        // Already sorted by points (descending) then by name
+        const sortedManifestations = this.common.universal_manifestations;
 
         let html = `
             <div class="table-container">
@@ -68,11 +86,11 @@ class BattleProfileRenderer {
     }
 
     renderArmies() {
-        if (!this.data || !this.data.data || !this.data.data.factions) {
+        if (!this.data || !this.data.factions) {
             return '<p>No Army data available.</p>';
         }
 
-        const factions = this.data.data.factions;
+        const factions = this.data.factions;
 
         let html = `
             <div class="army-selector-container">
@@ -98,102 +116,62 @@ class BattleProfileRenderer {
     }
 
     renderSelectedArmyContent(armyName) {
-        if (!this.data || !this.data.data || !this.data.data.factions) {
+        if (!this.data || !this.data.factions) {
             return '<p>No Army data available.</p>';
         }
 
-        const faction = this.data.data.factions.find(f => f.name === armyName);
+        // Shards are pre-split into heroes and units and "other" is grouped and sorted
+        const faction = this.factions[armyName];
         if (!faction) {
             return '<p>Army not found.</p>';
         }
 
         let html = `<h3>${armyName}</h3>`;
 
-        // Process battle profiles and separate heroes from units
-        if (faction.battle_profiles && faction.battle_profiles.length > 0) {
-            const heroes = faction.battle_profiles.filter(profile => profile.hero === true);
-            const units = faction.battle_profiles.filter(profile => profile.hero !== true);
-
-            // Render Heroes table
-            if (heroes.length > 0) {
-                html += this.renderHeroesTable(heroes);
-            } else {
-                html += this.renderEmptyHeroesTable();
-            }
-
-            // Render Units table  
-            if (units.length > 0) {
-                html += this.renderUnitsTable(units);
-            } else {
-                html += this.renderEmptyUnitsTable();
-            }
+        // Render Heroes table
+        if (faction.heroes.length > 0) {
+            html += this.renderHeroesTable(faction.heroes);
         } else {
-            // Render empty placeholder tables
             html += this.renderEmptyHeroesTable();
-            html += this.renderEmptyUnitsTable();
         }
 
-        // Process "other" data and group by type
-        if (faction.other && faction.other.length > 0) {
-            const groupedByType = {};
-
-            faction.other.forEach(item => {
-                const type = (item.type || 'Other').trim();
-                if (!groupedByType[type]) {
-                    groupedByType[type] = [];
-                }
-                groupedByType[type].push(item);
-            });
-
-            // Sort types alphabetically
-            const sortedTypes = Object.keys(groupedByType).sort();
-
-            sortedTypes.forEach(type => {
-                // Sort items by points (descending) then by name (alphabetically)
-                const sortedItems = groupedByType[type].sort((a, b) => {
-                    const pointsA = a.points !== undefined ? a.points : 0;
-                    const pointsB = b.points !== undefined ? b.points : 0;
-
-                    if (pointsA !== pointsB) {
-                        return pointsB - pointsA; // Sort by points descending (highest first)
-                    }
-
-                    // If points are equal, sort alphabetically by name
-                    const nameA = (a.name || '').toLowerCase();
-                    const nameB = (b.name || '').toLowerCase();
-                    return nameA.localeCompare(nameB);
-                });
-
-                html += `
-                    <div class="table-container">
-                        <h4>${type}</h4>
-                        <table class="bp-table two-column-table">
-                            <thead>
-                                <tr>
-                                    <th>Name</th>
-                                    <th>Points</th>
-                                </tr>
-                            </thead>
-                            <tbody>
-                `;
+        // Render Units table
+        if (faction.units.length > 0) {
+            html += this.renderUnitsTable(faction.units);
+        } else {
+            html += this.renderEmptyUnitsTable();
+        }
 
-                sortedItems.forEach((item, index) => {
-                    const rowClass = index % 2 === 0 ? 'even-row' : 'odd-row';
-                    html += `
-                                <tr class="${rowClass}">
-                                    <td>${item.name || 'N/A'}</td>
-                                    <td>${item.points !== undefined ? item.points : 'N/A'}</td>
-                                </tr>
-                    `;
-                });
+        faction.other.forEach(group => {
+            html += `
+                <div class="table-container">
+                    <h4>${group.type}</h4>
+                    <table class="bp-table two-column-table">
+                        <thead>
+                            <tr>
+                                <th>Name</th>
+                                <th>Points</th>
+                            </tr>
+                        </thead>
+                        <tbody>
+            `;
 
+            group.items.forEach((item, index) => {
+                const rowClass = index % 2 === 0 ? 'even-row' : 'odd-row';
                 html += `
-                            </tbody>
-                        </table>
-                    </div>
+                            <tr class="${rowClass}">
+                                <td>${item.name || 'N/A'}</td>
+                                <td>${item.points !== undefined ? item.points : 'N/A'}</td>
+                            </tr>
                 `;
             });
-        }
+
+            html += `
+                        </tbody>
+                    </table>
+                </div>
+            `;
+        });
 
         return html;
     }
@@ -498,11 +476,11 @@ class BattleProfileRenderer {
     }
 
     renderRegimentsOfRenown() {
-        if (!this.data || !this.data.data || !this.data.data.regiments_of_renown) {
+        if (!this.common || !this.common.regiments_of_renown) {
             return '<p>No Regiments of Renown data available.</p>';
         }
 
-        const regiments = this.data.data.regiments_of_renown;
+        const regiments = this.common.regiments_of_renown;
 
         let html = `
             <div class="table-container">
@@ -603,12 +581,14 @@ async function updateTabContent(tabName) {
             }, 0);
             break;
         case 'regiments':
+            await bpRenderer.loadCommon();
             content = `
                 <h2>Regiments of Renown</h2>
                 ${bpRenderer.renderRegimentsOfRenown()}
             `;
             break;
         case 'manifestations':
+            await bpRenderer.loadCommon();
             content = `
                 <h2>Universal Manifestations</h2>
                 ${bpRenderer.renderUniversalManifestations()}
@@ -640,7 +620,7 @@ document.addEventListener('DOMContentLoaded', async function () {
 });
 
 // Function to render selected army content
-function renderSelectedArmy() {
+async function renderSelectedArmy() {
     const select = document.getElementById('army-select');
     const contentDiv = document.getElementById('army-content');
 
@@ -652,6 +632,9 @@ function renderSelectedArmy() {
         return;
     }
 
+    await bpRenderer.loadFaction(selectedArmy);
+    // Ignore the result if another army was selected while this one loaded
+    if (select.value !== selectedArmy) return;
     const content = bpRenderer.renderSelectedArmyContent(selectedArmy);
     contentDiv.innerHTML = content;
 }
@@ -1,10 +1,18 @@
 import os
+import json
 import shutil
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+import metrics
 
 API_URL = "https://www.warhammer-community.com/api/search/downloads/"
 PDF_BASE_URL = "https://assets.warhammer-community.com/"
+DEFAULT_DOWNLOAD_WORKERS = 8
+CHUNK_SIZE = 64 * 1024
+MANIFEST_FILE = "manifest.json"
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
 
@@ -15,32 +23,127 @@ def reset_downloads_dir(download_dir):
     logging.info(f"Creating '{download_dir}' directory.")
     os.makedirs(download_dir)
 
-def download_file(url, filename, download_dir):
+def create_session(pool_size=DEFAULT_DOWNLOAD_WORKERS):
+    """Create a requests session whose connection pool can serve pool_size concurrent downloads."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def load_manifest(download_dir):
+    """Load the download manifest, a mapping of local file name to the entry recorded when it was fetched."""
+    path = os.path.join(download_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get("files", {})
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable manifest {path}: {e}")
+        return {}
+
+def save_manifest(download_dir, manifest):
+    path = os.path.join(download_dir, MANIFEST_FILE)
+    with open(path + ".part", "w") as f:
+        json.dump({"files": manifest}, f, indent=2, sort_keys=True)
+    os.replace(path + ".part", path)
+
+def conditional_headers(entry, path):
+    """Build If-None-Match/If-Modified-Since headers if the previously downloaded copy is still intact."""
+    if not entry or not os.path.exists(path) or os.path.getsize(path) != entry.get("size"):
+        return {}
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+def download_file(url, filename, download_dir, session=None, api_file=None, previous=None):
+    """Download url to download_dir/filename and return its manifest entry.
+
+    If `previous` is the manifest entry for the same url, a conditional GET is sent and the
+    local copy is kept when the server answers 304 Not Modified.
+    """
+    http = session or requests
+    path = os.path.join(download_dir, filename)
+    part_path = path + ".part"
+    headers = conditional_headers(previous, path) if previous and previous.get("url") == url else {}
     logging.info(f"Downloading {filename} from {url}")
-    response = requests.get(url)
-    response.raise_for_status()
-    with open(os.path.join(download_dir, filename), "wb") as f:
-        f.write(response.content)
+    with metrics.stage("download", file=filename) as record, http.get(url, stream=True, headers=headers) as response:
+        if response.status_code == 304 and headers:
+            logging.info(f"{filename} is unchanged")
+            record["unchanged"] = True
+            return {**previous, "unchanged": True}
+        response.raise_for_status()
+        # Stream the body to disk in chunks, hashing it on the way instead of re-reading the file later
+        hash_md5 = hashlib.md5()
+        size = 0
+        with open(part_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+                hash_md5.update(chunk)
+                size += len(chunk)
+        record["bytes"] = size
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+    os.replace(part_path, path)
     logging.info(f"Saved {filename}")
+    return {
+        "file": api_file,
+        "url": url,
+        "etag": etag,
+        "last_modified": last_modified,
+        "size": size,
+        "hash": hash_md5.hexdigest(),
+    }
+
+def download_files(jobs, download_dir, session, workers=DEFAULT_DOWNLOAD_WORKERS, manifest=None):
+    """Download (url, filename, api_file) jobs with at most `workers` concurrent requests.
 
-def get_api_pdfs():
+    Returns the new manifest, a mapping of filename to manifest entry.
+    """
+    manifest = manifest or {}
+    workers = max(1, min(workers, len(jobs) or 1))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            filename: pool.submit(download_file, url, filename, download_dir, session, api_file, manifest.get(filename))
+            for url, filename, api_file in jobs
+        }
+        # Re-raise the first failure, same as the serial loop did
+        return {filename: future.result() for filename, future in futures.items()}
+
+def remove_stale_files(download_dir, manifest):
+    """Delete PDFs left over from earlier runs that are no longer published."""
+    for name in os.listdir(download_dir):
+        if (name.endswith(".pdf") or name.endswith(".part")) and name not in manifest:
+            logging.info(f"Removing stale file {name}")
+            os.remove(os.path.join(download_dir, name))
+
+def get_api_pdfs(session=None, api_url=API_URL):
     payload = {
         "index": "downloads_v2",
         "searchTerm": "",
         "gameSystem": "warhammer-age-of-sigmar",
         "language": "english"
     }
-    logging.info(f"Fetching PDF metadata from API: {API_URL}")
-    response = requests.post(API_URL, json=payload)
+    logging.info(f"Fetching PDF metadata from API: {api_url}")
+    http = session or requests
+    with metrics.stage("api_fetch"):
+        response = http.post(api_url, json=payload)
     response.raise_for_status()
     data = response.json()
     hits = data.get("hits", [])
     logging.info(f"Found {len(hits)} PDF entries from API.")
     return hits
 
-def download_pdfs(download_dir):
-    reset_downloads_dir(download_dir)
-    pdfs = get_api_pdfs()
+def plan_downloads(pdfs, pdf_base_url=PDF_BASE_URL):
+    """Pick the rules update, battle profiles summary and faction packs out of the API hits.
+
+    Returns the list of (url, filename, api_file) jobs and the list of missing required downloads.
+    """
+    jobs = []
     # Download rules update
     found_rules_update = False
     for pdf in pdfs:
@@ -50,8 +153,7 @@ def download_pdfs(download_dir):
         if not file_name:
             continue
         if "rules update" in title:
-            url = PDF_BASE_URL + file_name
-            download_file(url, "rules_update.pdf", download_dir)
+            jobs.append((pdf_base_url + file_name, "rules_update.pdf", file_name))
             found_rules_update = True
             break
     if not found_rules_update:
@@ -65,14 +167,13 @@ def download_pdfs(download_dir):
         if not file_name:
             continue
         if "battle profiles" == title:
-            url = PDF_BASE_URL + file_name
-            download_file(url, "battle_profiles.pdf", download_dir)
+            jobs.append((pdf_base_url + file_name, "battle_profiles.pdf", file_name))
             found_battle_profiles = True
             break
     if not found_battle_profiles:
         logging.warning("No battle profiles PDF found.")
     # Download faction battle profiles
-    faction_count = 0
+    faction_jobs = {}  # filename to api file name, the last hit for a faction wins
     for pdf in pdfs:
         title = pdf.get("title", "")
         file_id = pdf.get("id", {})
@@ -83,22 +184,44 @@ def download_pdfs(download_dir):
             # Extract faction name
             faction = title.lower().replace("battle profiles","").replace("faction pack:","").replace("faction","").replace("pack:","").replace(".pdf","").strip().replace(" ", "_")
             if faction:
-                filename = f"faction_{faction}_battle_profiles.pdf"
-                url = PDF_BASE_URL + file_name
-                download_file(url, filename, download_dir)
-                faction_count += 1
-    logging.info(f"Downloaded {faction_count} faction battle profiles PDFs.")
+                faction_jobs[f"faction_{faction}_battle_profiles.pdf"] = file_name
+    jobs.extend((pdf_base_url + file_name, filename, file_name) for filename, file_name in faction_jobs.items())
 
-    # Throw error if any required file is missing
     errors = []
     if not found_rules_update:
         errors.append("rules_update.pdf not found")
     if not found_battle_profiles:
         errors.append("battle_profiles.pdf not found")
-    if faction_count == 0:
+    if not faction_jobs:
         errors.append("No faction battle profiles PDFs found")
-    if errors:
-        raise RuntimeError("Required downloads missing: " + ", ".join(errors))
+    return jobs, errors
+
+def download_pdfs(download_dir, workers=DEFAULT_DOWNLOAD_WORKERS, force=False, api_url=API_URL, pdf_base_url=PDF_BASE_URL):
+    """Bring download_dir up to date with the published PDFs.
+
+    Files recorded in the download manifest are revalidated with conditional GETs and only
+    re-downloaded when they changed. Pass force=True to wipe the directory and fetch everything.
+    """
+    with create_session(pool_size=workers) as session:
+        pdfs = get_api_pdfs(session, api_url=api_url)
+        jobs, errors = plan_downloads(pdfs, pdf_base_url=pdf_base_url)
+        # Fail on an incomplete (or empty) listing before touching the directory, so the
+        # files from the last good run are neither wiped nor pruned as stale
+        if errors:
+            raise RuntimeError("Required downloads missing: " + ", ".join(errors))
+        if force:
+            reset_downloads_dir(download_dir)
+        else:
+            os.makedirs(download_dir, exist_ok=True)
+        previous = load_manifest(download_dir)
+        manifest = download_files(jobs, download_dir, session, workers=workers, manifest=previous)
+    # Only reached when every download succeeded, download_files re-raises the first failure
+    unchanged = [filename for filename, entry in manifest.items() if entry.pop("unchanged", False)]
+    remove_stale_files(download_dir, manifest)
+    save_manifest(download_dir, manifest)
+    faction_count = sum(1 for filename in manifest if filename.startswith("faction_"))
+    logging.info(f"Downloaded {faction_count} faction battle profiles PDFs.")
+    logging.info(f"{len(manifest) - len(unchanged)} files downloaded, {len(unchanged)} unchanged.")
 
 if __name__ == "__main__":
     download_pdfs("downloads")
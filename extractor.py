@@ -4,22 +4,36 @@ import pdfplumber
 from extractors.faq_extractor import extract_faq_data
 # from extractors.rules_extractor import extract_rules_data  # Not implemented yet
 from extractors.battle_profile_extractor import extract_battle_profile_data
-from metadata import create_metadata
+from metadata import create_metadata, content_hash
+from overlay_engine import OverlayEngine
+from output_writer import write_json, write_battle_profile_shards
+import metrics
 
 OVERLAY_DIR = "overlays"
 
-def extract_and_save(download_dir, output_dir, faq=True, bps=True):
+def extract_and_save(download_dir, output_dir, faq=True, bps=True, cache=None, jobs=1, pretty=False, compress=True, triage=True, memory_budget=None):
     # Load rules_update.pdf and run extract_faq_data
     rules_update_path = os.path.join(download_dir, "rules_update.pdf")
     if os.path.exists(rules_update_path) and faq:
         print(f"Processing FAQ from {rules_update_path}...")
-        pdf_metadata = create_metadata(rules_update_path)
-        with pdfplumber.open(rules_update_path) as pdf:
-            faq_data = extract_faq_data(pdf.pages)
+        faq_data = cache.get("faq", content_hash(rules_update_path)) if cache else None
+        if faq_data is not None:
+            print(f"Using cached extraction for {rules_update_path}")
+            pdf_metadata = create_metadata(rules_update_path)
+        else:
+            # Open the PDF once and share the handle between metadata and extraction
+            with metrics.stage("open_pdf", pdf="rules_update.pdf"):
+                pdf = pdfplumber.open(rules_update_path)
+            with pdf:
+                pdf_metadata = create_metadata(rules_update_path, pdf=pdf)
+                with metrics.stage("faq_extract", pages=len(pdf.pages)):
+                    faq_data = extract_faq_data(pdf.pages, jobs=jobs, triage=triage, memory_budget=memory_budget, cache=cache)
+            if cache:
+                cache.put("faq", pdf_metadata["hash"], faq_data)
         # Save FAQ output
         os.makedirs(output_dir, exist_ok=True)
-        with open(os.path.join(output_dir, "faq.json"), "w") as f:
-            json.dump({**pdf_metadata, "type": "faq", "data": faq_data}, f, indent=2)
+        with metrics.stage("write_json", file="faq.json"):
+            write_json(os.path.join(output_dir, "faq.json"), {**pdf_metadata, "type": "faq", "data": faq_data}, pretty=pretty, compress=compress)
     else:
         print("rules_update.pdf not found in downloads directory.")
 
@@ -31,53 +45,25 @@ def extract_and_save(download_dir, output_dir, faq=True, bps=True):
     # For battle profiles, pass the downloads dir to extract_battle_profile_data
     if bps:
         print(f"Processing battle profiles from {download_dir}...")
-        battle_profile_data = extract_battle_profile_data(download_dir)
-        battle_profiles_data = merge_overlays(OVERLAY_DIR, battle_profile_data)
+        with metrics.stage("bp_extract"):
+            battle_profile_data = extract_battle_profile_data(download_dir, cache=cache, jobs=jobs, triage=triage, memory_budget=memory_budget)
+        with metrics.stage("overlay_merge"):
+            battle_profiles_data = merge_overlays(OVERLAY_DIR, battle_profile_data)
 
-        with open(os.path.join(output_dir, "battleprofile.json"), "w") as f:
-            json.dump({"type": "battleprofile", "data": battle_profile_data}, f, indent=2)
+        os.makedirs(output_dir, exist_ok=True)
+        with metrics.stage("write_json", file="battleprofile.json"):
+            write_json(os.path.join(output_dir, "battleprofile.json"), {"type": "battleprofile", "data": battle_profile_data}, pretty=pretty, compress=compress)
+        # Per-faction shards so the site can load only the army being viewed
+        with metrics.stage("write_json", file="battleprofile shards"):
+            write_battle_profile_shards(output_dir, battle_profile_data, pretty=pretty, compress=compress)
 
 def merge_overlays(overlays_dir, data):
     print("MERGING OVERLAYS")
     print("======================")
 
-    # Load all overlay JSON files
-    overlay_files = [f for f in os.listdir(overlays_dir) if f.endswith(".json")]
-    overlays = []
-    for overlay_file in overlay_files:
-        with open(os.path.join(overlays_dir, overlay_file), "r") as f:
-            print("Loading overlay:", overlay_file)
-            overlay_data = json.load(f)
-            overlays.append(overlay_data)
-
-    # Merge overlays with battle profiles
-    for o in overlays:
-        o_factions = o.get("factions", [])
-        for o_faction in o_factions:
-            d_factions = data.get("factions", [])
-            if o_faction["name"] in [f["name"] for f in d_factions]:
-                # get faction
-                d_faction = next((f for f in d_factions if f["name"] == o_faction["name"]), None)
-
-                o_bps = o_faction.get("battle_profiles", [])
-                for o_bp in o_bps:
-                    # Find the corresponding battle profile in the data
-                    d_bp = next((bp for bp in data.get("battle_profiles", []) if bp["name"] == o_bp["name"]), None)
-                    if d_bp:
-                        print("Overriding battle profile:", d_bp["name"], "to ", o_faction["name"])
-                        # override battleprofile
-                        d_bp = o_bp
-                    else:
-                        print("Appending new battle profile:", o_bp["name"], "to ", o_faction["name"])
-                        # append new battleprofile to data battle_profiles
-                        d_faction["battle_profiles"].append(o_bp)
-                break
-            else:
-                # append new faction to data factions
-                print("Appending new faction:", o_faction["name"])
-                data["factions"].append(o_faction)
-                break
-
+    engine = OverlayEngine(data)
+    engine.apply_dir(overlays_dir)
+    engine.report()
     return data
 
 if __name__ == "__main__":
@@ -1,14 +1,26 @@
 from pdfplumber import PDF
 import re
-from extractors.utils import normalize_text, extract_points
+from extractors.utils import normalize_text, normalize_table, extract_points, parse_points
 from extractors.regiment_of_renown import RegimentOfRenown
-from extractors.battle_profiles import OtherBattleProfile, UnitBattleProfile, FactionBattleProfiles
-from extractors.regiment_option import RegimentOption
-from extractors.bp_table import determine_table_type
+from extractors.battle_profiles import OtherBattleProfile, UnitBattleProfile, FactionBattleProfiles, report_unhandled_notes
+from extractors.regiment_option import RegimentVocabulary
+from extractors.bp_table import compile_table
+from extractors.page_geometry import HorizontalLineIndex, BoxIndex
+from extractors.page_triage import triage_bp_page, skip_summary
+from extractors.page_stream import iter_pages
+from extractors.content_text import header_text
+from extractors.keyword_matcher import KeywordMatcher
 import pdfplumber
+from pdfplumber.table import TableSettings
 import glob
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+import logging
+import metadata
+import metrics
+
+logger = logging.getLogger(__name__)
 
 class BPExtractor:
     def __init__(self):
@@ -17,21 +29,32 @@ class BPExtractor:
         self.regiments_of_renown = []  # List to hold regiments of renown
 
     def process_page(self, page):
-        
         # Extract text and tables from the page
-        outside_text, tables = extract_bp_tables(page)
+        self.process_page_analysis(analyze_bp_page(page))
+
+    def process_document(self, document):
+        """Process the page analyses of a document produced by parse_bp_document."""
+        for analysis in document["pages"]:
+            self.process_page_analysis(analysis)
+
+    def process_page_analysis(self, analysis):
+        self.process_page_tables(analysis["outside_lines"], analysis["tables"])
+
+    def process_page_tables(self, outside_text, tables):
         title = normalize_text(outside_text[3])
 
         # Process each table to extract battle profile data
         for table in tables:
-            table_type = determine_table_type(table)
+            schema = compile_table(table)
+            table_type = schema.type
             if title == "REGIMENTS OF RENOWN":
                 for row in table:
                     regiment = RegimentOfRenown(row)
                     if regiment.points > 0:
                         self.regiments_of_renown.append(regiment)
                     else:
-                        print(f"Warning: Regiment '{regiment.name}' has no points.")
+                        logger.warning(f"Regiment '{regiment.name}' has no points.")
+                        metrics.anomaly("regiment_without_points", regiment.name)
                 continue
 
             # TODO: handle universal manifestations separately
@@ -44,11 +67,12 @@ class BPExtractor:
                     if "LEGENDS" in maybe_title:
                         # add a row above with the title
                         table.insert(0, [title])
+                        schema = compile_table(table)  # the header moved down a row
                     else:
                         title = maybe_title
                 if title not in self.factions:
                     self.factions[title] = FactionBattleProfiles(title)
-                self.factions[title].process_table(table)
+                self.factions[title].process_table(table, schema)
 
     def process_regiments_of_renown(self, table):
         """Process a table of regiments of renown."""
@@ -66,12 +90,12 @@ class BPExtractor:
         self.regiments_of_renown.extend(profiles)
     def process_universal_manifestations(self, table):
         """Process a table of universal manifestations."""
-        print(f"Processing universal manifestations table")
+        logger.debug("Processing universal manifestations table")
         header = table[0]
         profiles = []
-        for row in table[1:]:
-            name = normalize_text(row[0].replace('\n', ' ').strip())
-            points = extract_points(row[1].strip())
+        for row in normalize_table(table[1:]):
+            name = row[0]
+            points = parse_points(row[1])
             profiles.append({
                 "name": name,
                 "points": points
@@ -93,70 +117,72 @@ class BPExtractor:
                 subhero_categories.extend(profile.subhero_categories)
 
         keywords = sorted(set(keywords), key=lambda x: (-len(x), x.lower()))  # Remove duplicates, sort longest first then alpha
-        unit_names = list(set(unit_names))  # Remove duplicates
+        unit_names = sorted(set(unit_names))  # Remove duplicates, sorted so duplicate titles resolve the same every run
         subhero_categories = list(set(subhero_categories))  # Remove duplicates
         # units with names like: Name, Title. we want a map of Name to full name
         titled_units = {name.split(",")[0].strip(): name for name in unit_names if "," in name}
         print(f"Collected {len(keywords)} keywords, {len(unit_names)} unit names, {len(titled_units)} title units and {len(subhero_categories)} subhero categories.")
+        # Indexed once and shared by every regiment option
+        vocabulary = RegimentVocabulary(KeywordMatcher(keywords), unit_names, titled_units, subhero_categories)
         for faction in self.factions.values():
             # Finalize regiment options for each faction's battle profiles
             for profile in faction.battle_profiles.values():
-                profile.finalize_regiment_options(keywords=keywords, unit_names=unit_names, titled_units=titled_units, subhero_categories=subhero_categories)
+                profile.finalize_regiment_options(vocabulary=vocabulary)
+        report_unhandled_notes(profile for faction in self.factions.values() for profile in faction.battle_profiles.values())
 
     def get_battle_profiles(self):
-        """Get the extracted battle profiles."""
+        """Get the extracted battle profiles, with the profiles as objects (see extractors.model)."""
         return {
             "universal_manifestations": self.universal_manifestations,
-            "regiments_of_renown": [reg.to_dict() for reg in self.regiments_of_renown],
+            "regiments_of_renown": list(self.regiments_of_renown),
             "factions": [faction.to_dict() for faction in self.factions.values()],
         }
 
-def is_strikethrough(word, lines):
-    """Detects if a word is striked through by checking if any horizontal line intersects the word's bounding box."""
-    x0, top, x1, bottom = word["x0"], word["y0"], word["x1"], word["y1"]
-    # Get all horizontal lines on the page
-    for line in lines:
-        lx0, ly0, lx1, ly1 = line["x0"], line["y0"], line["x1"], line["y1"]
-        # Check if line is horizontal (y0 == y1 or very close)
-        if abs(ly0 - ly1) <= 1:
-            # Check if line horizontally crosses the word's bbox
-            if (lx0 <= x1 and lx1 >= x0) and (ly0 >= top and ly0 <= bottom):
-                return True
-    return False
-
-def extract_bp_tables(page):
-    """Extracts lines of text outside tables and tables from a PDF page."""
+def is_strikethrough(word, line_index):
+    """Detects if a word is striked through by checking if any horizontal line intersects the word's bounding box.
+
+    line_index is a HorizontalLineIndex of the page's lines.
+    """
+    return line_index.crosses(word["x0"], word["y0"], word["x1"], word["y1"])
+
+PUBLISHED_DATE_PATTERN = re.compile(r"(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})", re.IGNORECASE)
+# Height in points of the top of the first page that is searched for the published date first
+HEADER_BAND_HEIGHT = 150
+
+# Text settings are passed on to Table.extract, same as page.extract_tables does
+BP_TABLE_SETTINGS = TableSettings.resolve({"text_x_tolerance": 1})
+
+def analyze_bp_page(page):
+    """Extracts lines of text outside tables and tables from a PDF page in one pass.
+
+    Tables are detected once and their cell text is extracted from the same Table objects.
+    Returns a JSON-ready record {"outside_lines": [...], "tables": [...]}.
+    """
     # Remove strikethrough text from the page before extracting tables
-    lines = page.lines
+    line_index = HorizontalLineIndex(page.lines)
     def not_strikethrough(obj):
         if obj.get("text") == " ":
             return False
         # Only check for strikethrough if obj has text and bbox
         if "text" in obj and obj["text"] and all(k in obj for k in ["x0", "top", "x1", "bottom"]):
-            if is_strikethrough(obj, lines):
-                print(f"[DEBUG] Removed strikethrough text before table extraction: '{obj['text']}' at ({obj['x0']},{obj['top']},{obj['x1']},{obj['bottom']})")
+            if is_strikethrough(obj, line_index):
+                logger.debug(f"Removed strikethrough text before table extraction: '{obj['text']}' at ({obj['x0']},{obj['top']},{obj['x1']},{obj['bottom']})")
+                metrics.count("strikethrough_chars_removed")
                 return False
         return True
     page = page.filter(not_strikethrough)
-    tables = page.extract_tables(table_settings={"text_x_tolerance": 1})
+    found_tables = page.find_tables(table_settings=BP_TABLE_SETTINGS)
+    tables = [table.extract(**BP_TABLE_SETTINGS.text_settings) for table in found_tables]
 
-    # Get all table bbox regions
-    table_bboxes = []
-    for table in page.find_tables():
-        table_bboxes.append(table.bbox)
+    # Get all table bbox regions, with a small margin around them
+    table_index = BoxIndex([table.bbox for table in found_tables], margin=2)
 
     # Extract all words with their positions
     words = page.extract_words()
 
     # Filter words that are NOT inside any table bbox
     def is_outside_tables(word):
-        margin = 2  # Add a small margin around table bounding boxes
-        x0, top, x1, bottom = word["x0"], word["top"], word["x1"], word["bottom"]
-        for bbox in table_bboxes:
-            bx0, btop, bx1, bbottom = bbox
-            if (x0 >= bx0 - margin and x1 <= bx1 + margin and top >= btop - margin and bottom <= bbottom + margin):
-                return False
-        return True
+        return not table_index.contains(word["x0"], word["top"], word["x1"], word["bottom"])
 
     outside_words = []
     for w in words:
@@ -180,9 +206,96 @@ def extract_bp_tables(page):
     if current_line:
         lines.append(" ".join(w["text"] for w in current_line))  # Ensure proper spacing
 
-    return lines, tables
+    return {"outside_lines": lines, "tables": tables}
 
-def extract_battle_profile_data(pdf_dir):
+def parse_bp_document(pdf, skip_before=None, triage=True):
+    """Extract the raw page tables of a battle profiles PDF.
+
+    The result holds one analyze_bp_page record per page. It is plain JSON data so it can
+    be cached and replayed through BPExtractor.process_document. If the PDF was published
+    before skip_before its pages are not parsed and "pages" is None. With triage, pages that
+    cannot hold battle profile tables are skipped and listed by reason under "skipped".
+    """
+    pdf_name = os.path.basename(pdf.path) if pdf.path else None
+    with metrics.stage("bp_date_probe", pdf=pdf_name):
+        published = get_published_month_year(pdf)
+    document = {"published": published.strftime("%Y-%m-%d") if published else None, "pages": None, "skipped": {}}
+    if skip_before and published and published < skip_before:
+        return document
+    document["pages"] = []
+    for page in iter_pages(pdf.pages):
+        reason = triage_bp_page(page) if triage else None
+        if reason:
+            document["skipped"].setdefault(reason, []).append(page.page_number)
+            metrics.count("bp_pages_skipped")
+            continue
+        with metrics.stage("bp_page_tables", pdf=pdf_name, page=page.page_number) as record:
+            analysis = analyze_bp_page(page)
+            record["tables"] = len(analysis["tables"])
+        document["pages"].append(analysis)
+    metrics.count("bp_pages", len(document["pages"]))
+    return document
+
+def parse_bp_file(pdf_path, skip_before=None, triage=True, memory_budget=None):
+    """Open and parse one battle profiles PDF. Runs in worker processes when extracting in parallel.
+
+    Returns the document and the metrics recorded while parsing it. With a memory_budget (MB)
+    the peak memory used for the PDF is recorded too.
+    """
+    with metrics.isolated() as recorded, metrics.track_memory(os.path.basename(pdf_path), memory_budget):
+        with metrics.stage("open_pdf", pdf=os.path.basename(pdf_path)):
+            pdf = pdfplumber.open(pdf_path)
+        with pdf:
+            document = parse_bp_document(pdf, skip_before=skip_before, triage=triage)
+    return document, recorded.to_dict()
+
+def load_bp_documents(pdf_paths, cache=None, skip_before=None, jobs=1, triage=True, memory_budget=None):
+    """Return the raw page tables of each PDF in pdf_paths, in the same order.
+
+    PDFs whose bytes are in the cache are not opened. The rest are parsed in up to `jobs`
+    worker processes. PDFs published before skip_before get a document with "pages" None;
+    their published date is cached on its own so later runs skip them without opening them.
+    """
+    documents = {}
+    content_hashes = {}
+    if cache:
+        for pdf_path in pdf_paths:
+            content_hashes[pdf_path] = metadata.content_hash(pdf_path)
+            if skip_before:
+                probe = cache.get("bp_date", content_hashes[pdf_path])
+                if probe is not None and is_stale(probe, skip_before):
+                    documents[pdf_path] = {"published": probe["published"], "pages": None, "skipped": {}}
+                    continue
+            document = cache.get("bp", content_hashes[pdf_path])
+            if document is not None:
+                print(f"Using cached extraction for {pdf_path}")
+                documents[pdf_path] = document
+
+    pending = [pdf_path for pdf_path in pdf_paths if pdf_path not in documents]
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as pool:
+            parsed = list(pool.map(parse_bp_file, pending, [skip_before] * len(pending), [triage] * len(pending), [memory_budget] * len(pending)))
+    else:
+        parsed = [parse_bp_file(pdf_path, skip_before, triage, memory_budget) for pdf_path in pending]
+
+    for pdf_path, (document, recorded) in zip(pending, parsed):
+        metrics.merge(recorded)
+        if cache:
+            cache.put("bp_date", content_hashes[pdf_path], {"published": document["published"]})
+            if document["pages"] is not None:
+                cache.put("bp", content_hashes[pdf_path], document)
+        documents[pdf_path] = document
+    return [documents[pdf_path] for pdf_path in pdf_paths]
+
+def document_date(document):
+    return datetime.strptime(document["published"], "%Y-%m-%d") if document["published"] else None
+
+def is_stale(document, skip_before):
+    """Whether a document (or date probe) was published before skip_before."""
+    published = document_date(document)
+    return bool(skip_before and published and published < skip_before)
+
+def extract_battle_profile_data(pdf_dir, cache=None, jobs=1, triage=True, memory_budget=None):
     extractor = BPExtractor()
     # Process battle_profiles.pdf
     battle_profiles_path = os.path.join(pdf_dir, "battle_profiles.pdf")
@@ -190,39 +303,53 @@ def extract_battle_profile_data(pdf_dir):
     if os.path.exists(battle_profiles_path):
         print(f"PROCESSING BATTLE PROFILES: {battle_profiles_path}")
         print("==================================")
-        with pdfplumber.open(battle_profiles_path) as pdf:
-            main_bp_date = get_published_month_year(pdf)
-            for page in pdf.pages:
-                extractor.process_page(page)
+        document, = load_bp_documents([battle_profiles_path], cache, triage=triage, memory_budget=memory_budget)
+        main_bp_date = document_date(document)
+        print(f"Triage skipped {skip_summary(document['skipped'])}")
+        extractor.process_document(document)
     else:
         print(f"Warning: {battle_profiles_path} not found.")
 
 
 
-    # Process all faction PDFs
+    # Process all faction PDFs. They are parsed independently (possibly in parallel) and
+    # merged in file name order so the output does not depend on the number of jobs.
     print(f"Main battle profiles published date: {main_bp_date}")
     faction_pattern = os.path.join(pdf_dir, "faction_*_battle_profiles.pdf")
-    for faction_pdf in glob.glob(faction_pattern):
-        with pdfplumber.open(faction_pdf) as pdf:
-            faction_bp_date = get_published_month_year(pdf)
-            print(f"Faction battle profiles {faction_pdf} published date: {faction_bp_date}")
-            # if faction_bp_date newer the main_bp_date process otherwise skip
-            if main_bp_date and faction_bp_date and faction_bp_date < main_bp_date:
-                print(f"Skipping {faction_pdf} as it is not newer than main battle profiles.")
-                continue
+    faction_pdfs = sorted(glob.glob(faction_pattern))
+    documents = load_bp_documents(faction_pdfs, cache, skip_before=main_bp_date, jobs=jobs, triage=triage, memory_budget=memory_budget)
+    for faction_pdf, document in zip(faction_pdfs, documents):
+        faction_bp_date = document_date(document)
+        print(f"Faction battle profiles {faction_pdf} published date: {faction_bp_date}")
+        # if faction_bp_date newer the main_bp_date process otherwise skip
+        if is_stale(document, main_bp_date):
+            metrics.count("bp_stale_pdfs_skipped")
+            print(f"Skipping {faction_pdf} as it is not newer than main battle profiles.")
+            continue
 
-            print(f"PROCESSING FACTION: {faction_pdf}")
-            print("==================================")
-            for page in pdf.pages:
-                extractor.process_page(page)
-    extractor.finalize()
+        print(f"PROCESSING FACTION: {faction_pdf}")
+        print("==================================")
+        print(f"Triage skipped {skip_summary(document['skipped'])}")
+        extractor.process_document(document)
+    with metrics.stage("finalize"):
+        extractor.finalize()
     return extractor.get_battle_profiles()
 
 def get_published_month_year(pdf):
     # check first page for a month and year pattern like "January 2024"
+    # The date is printed in the page header. Reading the header's strings straight from the
+    # content stream avoids laying the page out; only when no date is found that way (e.g. the
+    # font's encoding is not Latin-1) are the header band and then the whole page laid out.
     first_page = pdf.pages[0]
-    text = first_page.extract_text()
-    match = re.search(r"(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})", text, re.IGNORECASE)
+    match = PUBLISHED_DATE_PATTERN.search(header_text(first_page, HEADER_BAND_HEIGHT) or "")
+    if not match:
+        metrics.count("bp_date_probe_layouts")
+        # The band is built from the page's own box, which does not start at 0 for bleed layouts
+        x0, top, x1, bottom = first_page.bbox
+        header = first_page.crop((x0, top, x1, min(bottom, top + HEADER_BAND_HEIGHT)))
+        match = PUBLISHED_DATE_PATTERN.search(header.extract_text())
+        if not match:
+            match = PUBLISHED_DATE_PATTERN.search(first_page.extract_text())
     if match:
         month, year = match.groups()
         # return comparable date object
@@ -1,29 +1,64 @@
+class TableType:
+    """A kind of battle profile table, recognised by the header columns it requires.
 
-def determine_table_type(table):
-    """Determine the type of table based on its content."""
-    if not table:
-        return "unknown"
+    The required columns must all appear in one of header_rows (checked in order);
+    header_row is the row holding the column names of the data rows below it.
+    """
+    def __init__(self, name, required, header_rows=(0,), header_row=0):
+        self.name = name
+        self.required = required
+        self.header_rows = header_rows
+        self.header_row = header_row
 
-    # Compare header row
-    header = table[0]
-    header2 = table[1] if len(table) > 1 else []
+    def matches(self, table):
+        for index in self.header_rows:
+            header = table[index] if len(table) > index else []
+            if all(col in header for col in self.required):
+                return True
+        return False
+
+# Checked in order, the first match wins. A new table type only needs an entry here and a
+# handler in FactionBattleProfiles.process_table.
+TABLE_TYPES = [
     # heroes: HEROES UNIT SIZE POINTS REGIMENT OPTIONS NOTES BASE SIZE
-    def header_includes(required):
-        return all(col in header for col in required)
-
-    if header_includes(["HEROES", "UNIT SIZE", "POINTS", "REGIMENT OPTIONS", "NOTES", "BASE SIZE"]):
-        return "heroes"
-    elif header_includes(["UNITS", "UNIT SIZE", "POINTS", "RELEVANT KEYWORDS", "NOTES", "BASE SIZE"]):
-        return "units"
-    elif header_includes(["TYPE", "NAME", "POINTS", "NOTES"]):
-        return "other"
-    elif header_includes(["NAME", "POINTS", "NOTES"]):
-        return "universal_manifestations"
-    elif "UNIT SUMMARY" in header:
-        return "regiment_of_renown"
-    elif "LEGENDS UNITS" in header2 or "LEGENDS UNITS" in header:
-        return "legends_units"
-    elif "LEGENDS HEROES" in header2 or "LEGENDS HEROES" in header:
-        return "legends_heroes"
-    else:
-        return "unknown"
\ No newline at end of file
+    TableType("heroes", ["HEROES", "UNIT SIZE", "POINTS", "REGIMENT OPTIONS", "NOTES", "BASE SIZE"]),
+    TableType("units", ["UNITS", "UNIT SIZE", "POINTS", "RELEVANT KEYWORDS", "NOTES", "BASE SIZE"]),
+    TableType("other", ["TYPE", "NAME", "POINTS", "NOTES"]),
+    TableType("universal_manifestations", ["NAME", "POINTS", "NOTES"]),
+    TableType("regiment_of_renown", ["UNIT SUMMARY"]),
+    # legends tables may have a title row above the header
+    TableType("legends_units", ["LEGENDS UNITS"], header_rows=(1, 0), header_row=1),
+    TableType("legends_heroes", ["LEGENDS HEROES"], header_rows=(1, 0), header_row=1),
+]
+
+class TableSchema:
+    """A table classified once, with its header compiled to a column name to index map."""
+    def __init__(self, table_type, header):
+        self.type = table_type.name if table_type else "unknown"
+        self.header_row = table_type.header_row if table_type else 0
+        self.header = header
+        self.columns = {}
+        for index, name in enumerate(header):
+            self.columns.setdefault(name, index)  # first column wins, like header.index
+
+    def rows(self, table):
+        """The data rows below the header."""
+        return table[self.header_row + 1:]
+
+    def decode(self, row):
+        """Map the header's column names to the row's cells (None past the end of a short row)."""
+        return {name: row[index] if index < len(row) else None for name, index in self.columns.items()}
+
+def compile_table(table):
+    """Classify a table and compile its header."""
+    if not table:
+        return TableSchema(None, [])
+    for table_type in TABLE_TYPES:
+        if table_type.matches(table):
+            header = table[table_type.header_row] if len(table) > table_type.header_row else []
+            return TableSchema(table_type, header)
+    return TableSchema(None, table[0])
+
+def determine_table_type(table):
+    """Determine the type of table based on its content."""
+    return compile_table(table).type
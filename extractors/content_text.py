@@ -0,0 +1,79 @@
+"""Text shown by a page's content stream, read without laying the page out.
+
+Only the operators that move the text origin are followed, so this is much cheaper than
+pdfplumber's layout, but also rougher: strings are decoded as Latin-1 (text in fonts with
+a custom or CID encoding comes out as garbage), text in form XObjects is not seen and
+strings are joined with spaces even where they continue a word. Use it as a probe and fall
+back to the layout when it finds nothing.
+"""
+from pdfminer.pdfinterp import PDFContentParser
+from pdfminer.psparser import PSEOF, PSKeyword
+from pdfminer.utils import MATRIX_IDENTITY, mult_matrix
+
+SHOW_OPERATORS = {b"Tj", b"TJ", b"'", b'"'}
+
+def shown_strings(page_obj):
+    """Yield (baseline y in PDF space, text) of every string shown by the page's content stream."""
+    ctm = MATRIX_IDENTITY
+    saved = []
+    line_matrix = text_matrix = MATRIX_IDENTITY
+    leading = 0
+    operands = []
+    parser = PDFContentParser(page_obj.contents)
+    while True:
+        try:
+            _, obj = parser.nextobject()
+        except PSEOF:
+            break
+        if not isinstance(obj, PSKeyword):
+            operands.append(obj)
+            continue
+        op, args, operands = obj.name, operands, []
+        if op == b"q":
+            saved.append(ctm)
+        elif op == b"Q" and saved:
+            ctm = saved.pop()
+        elif op == b"cm" and len(args) == 6:
+            ctm = mult_matrix(tuple(args), ctm)
+        elif op == b"BT":
+            line_matrix = text_matrix = MATRIX_IDENTITY
+        elif op == b"Tm" and len(args) == 6:
+            line_matrix = text_matrix = tuple(args)
+        elif op == b"TL" and args:
+            leading = args[-1]
+        elif op in (b"Td", b"TD") and len(args) == 2:
+            if op == b"TD":
+                leading = -args[1]
+            line_matrix = text_matrix = mult_matrix((1, 0, 0, 1, args[0], args[1]), line_matrix)
+        elif op in (b"T*", b"'", b'"'):
+            line_matrix = text_matrix = mult_matrix((1, 0, 0, 1, 0, -leading), line_matrix)
+        if op in SHOW_OPERATORS and args:
+            shown = args[-1]
+            parts = shown if isinstance(shown, list) else [shown]
+            text = "".join(part.decode("latin-1") for part in parts if isinstance(part, bytes))
+            # The glyph advance only moves the origin along the baseline of unrotated text
+            yield mult_matrix(text_matrix, ctm)[5], text
+
+def header_text(page, height, line_tolerance=3):
+    """Text shown with its baseline in the top `height` points of the page.
+
+    Strings are grouped into lines by baseline (within line_tolerance points, like
+    extract_text's y_tolerance) and the lines joined top to bottom; within a line the
+    strings keep their stream order. Returns None for rotated pages and content streams
+    that cannot be parsed, where the caller has to use the layout.
+    """
+    page_obj = page.page_obj
+    if page_obj.rotate % 360:
+        return None
+    top = max(page_obj.mediabox[1], page_obj.mediabox[3])
+    try:
+        shown = [(y, text) for y, text in shown_strings(page_obj) if top - height <= y <= top]
+    except Exception:
+        return None
+    lines = []  # [baseline, [texts]], top to bottom
+    for y, text in sorted(shown, key=lambda item: -item[0]):
+        if lines and lines[-1][0] - y <= line_tolerance:
+            lines[-1][1].append(text)
+        else:
+            lines.append([y, [text]])
+    return "\n".join(" ".join(texts) for _, texts in lines)
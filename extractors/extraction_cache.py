@@ -0,0 +1,65 @@
+import os
+import json
+
+# Bump when the cached intermediate results for the same PDF bytes would change
+EXTRACTOR_VERSION = 4
+DEFAULT_CACHE_DIR = os.path.join(".cache", "extraction")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+class ExtractionCache:
+    """On-disk cache of per-document extraction results keyed by content hash and extractor version.
+
+    Entries are JSON files; the least recently used ones are evicted once the cache grows
+    past max_bytes. Reading an entry refreshes its mtime, which is what eviction orders by.
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, version=EXTRACTOR_VERSION):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def entry_path(self, kind, content_hash):
+        return os.path.join(self.cache_dir, f"{kind}-{content_hash}-v{self.version}.json")
+
+    def get(self, kind, content_hash):
+        """Return the cached payload or None."""
+        path = self.entry_path(kind, content_hash)
+        try:
+            with open(path, "r") as f:
+                payload = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return payload
+
+    def put(self, kind, content_hash, payload, evict=True):
+        """Store payload. Pass evict=False when writing many entries and call evict() once after."""
+        path = self.entry_path(kind, content_hash)
+        try:
+            with open(path + ".part", "w") as f:
+                json.dump(payload, f, separators=(",", ":"))
+            os.replace(path + ".part", path)
+        except OSError as e:
+            print(f"Warning: could not write extraction cache entry {path}: {e}")
+            return
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".json"):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
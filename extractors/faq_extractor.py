@@ -1,7 +1,36 @@
 import re
 from datetime import datetime
 import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+import os
+from bisect import bisect_left
+import pdfplumber
 from extractors.utils import normalize_text
+from extractors.page_triage import triage_faq_page, skip_summary
+from extractors.page_stream import iter_pages
+from extractors.page_hash import PageHasher
+import metrics
+
+class PrefixIndex:
+    """Sorted set of strings that finds a string starting with a given prefix by bisection.
+
+    When several strings start with the prefix the lexicographically smallest one is returned,
+    so the answer does not depend on insertion or hash order.
+    """
+    def __init__(self):
+        self.items = []
+
+    def add(self, item):
+        index = bisect_left(self.items, item)
+        if index == len(self.items) or self.items[index] != item:
+            self.items.insert(index, item)
+
+    def find_prefixed(self, prefix):
+        """The smallest string starting with prefix, or None."""
+        index = bisect_left(self.items, prefix)
+        if index < len(self.items) and self.items[index].startswith(prefix):
+            return self.items[index]
+        return None
 
 class FAQExtractor:
     def __init__(self):
@@ -15,12 +44,14 @@ class FAQExtractor:
         self.question_lines = []
         self.collecting_answer = False
         self.answer_lines = []
-        self.all_rule_titles = set()  # Store all rule titles to avoid duplicates
+        self.all_rule_titles = PrefixIndex()  # All rule titles seen so far, looked up by the start of a line
 
     def process_page(self, page):
-        """Process a single line of text."""
-        left_lines, right_lines, outside_lines = extract_text_from_columns(page)
+        """Process a single page."""
+        self.process_page_lines(*extract_text_from_columns(page))
 
+    def process_page_lines(self, left_lines, right_lines, outside_lines):
+        """Process the column lines of a page produced by extract_text_from_columns."""
         # If no FAQ pairs are found, skip processing
         if (not contains_faq(left_lines + right_lines)):
             return
@@ -41,10 +72,9 @@ class FAQExtractor:
 
         # Process FAQ Lines
         for i, line in enumerate(faq_lines):
-            # If a rule any rule title from self.all_rule_titles is found, finalize the previous question
-            if self.all_rule_titles and any(title.startswith(line) for title in self.all_rule_titles):
-                # get appropriate rule title from all rule titles
-                current_rule_title = next((title for title in self.all_rule_titles if title.startswith(line)), None)
+            # If the line starts any rule title from self.all_rule_titles, finalize the previous question
+            current_rule_title = self.all_rule_titles.find_prefixed(line)
+            if current_rule_title is not None:
                 self.finalize_question()
                 self.start_rule(current_rule_title)
 
@@ -215,30 +245,19 @@ def extract_text_from_columns(page):
     vertical_lines = [line for line in lines if abs(line["x1"] - line["x0"]) < 5 and abs(line["y1"] - line["y0"]) > 50]
     valid_boxes = []
     buffer = 10  # pixels to add above/below line
-    for index, vline in enumerate(vertical_lines):
+    for vline in vertical_lines:
         top = vline["top"] - buffer
         bottom = vline["bottom"] + buffer
         bbox = (0, top, page_width, bottom)
-        try:
-            cropped_page = page.crop(bbox)
-            cropped_words = cropped_page.extract_words()
-            image_text = " ".join(word["text"] for word in cropped_words)
-            if contains_faq(image_text):
-                area = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
-                valid_boxes.append((area, bbox, cropped_words))
-            #     im = page.to_image()
-            #     im.draw_rects([{"x0": bbox[0], "top": bbox[1], "x1": bbox[2], "bottom": bbox[3]}])
-            #     im.draw_rects(cropped_words)
-            #     im.draw_lines([vline])
-            #     im.save(f"debug_cropped_line_{index}.png")
-            # else:
-            #     im = page.to_image()
-            #     im.draw_rects([{"x0": bbox[0], "top": bbox[1], "x1": bbox[2], "bottom": bbox[3]}])
-            #     im.draw_rects(cropped_words)
-            #     im.draw_lines([vline])
-            #     im.save(f"debug_invalid_line_{index}.png")
-        except Exception:
+        # Same bounds check as page.crop: bands reaching past the page are not candidates
+        if not within_bbox(bbox, page.bbox):
             continue
+        # The page's words touching the band, instead of extracting the words of a crop
+        band_words = [word for word in words if overlaps(word, bbox)]
+        image_text = " ".join(word["text"] for word in band_words)
+        if contains_faq(image_text):
+            area = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
+            valid_boxes.append((area, bbox, band_words))
 
     if valid_boxes:
         # Select the largest valid box by area
@@ -302,24 +321,142 @@ def extract_text_from_columns(page):
 
 # checks if Q&A pairs are present in the text
 def contains_faq(text):
+    """Whether a "Q:" is followed somewhere by an "A:"."""
     # if text is lines join them
     if isinstance(text, list):
         text = " ".join(text)
-    return bool(re.search(r"Q:.*A:.*", text, re.DOTALL))
+    question = text.find("Q:")
+    return question != -1 and text.find("A:", question + 2) != -1
+
+def within_bbox(bbox, parent):
+    x0, top, x1, bottom = bbox
+    return parent[0] <= x0 and parent[1] <= top and x1 <= parent[2] and bottom <= parent[3]
+
+def overlaps(obj, bbox):
+    """Whether obj touches bbox, by the rule page.crop uses to keep objects."""
+    width = min(obj["x1"], bbox[2]) - max(obj["x0"], bbox[0])
+    height = min(obj["bottom"], bbox[3]) - max(obj["top"], bbox[1])
+    return width >= 0 and height >= 0 and width + height > 0
+
+def layout_page(page, triage=True):
+    """Return the column layout of a page, or the reason triage skipped it."""
+    reason = triage_faq_page(page) if triage else None
+    if reason:
+        return reason
+    with metrics.stage("faq_page_layout", pdf=os.path.basename(page.pdf.path) if page.pdf.path else None, page=page.page_number):
+        return extract_text_from_columns(page)
+
+def layout_faq_pages(pdf_path, page_indices, triage=True, memory_budget=None):
+    """Run extract_text_from_columns on the given pages. Runs in worker processes.
+
+    A page that fails to lay out yields its exception so the caller can raise it in page order.
+    Returns the layouts and the metrics recorded while computing them.
+    """
+    layouts = []
+    chunk_name = f"{os.path.basename(pdf_path)} pages {page_indices[0] + 1}-{page_indices[-1] + 1}"
+    with metrics.isolated() as recorded, metrics.track_memory(chunk_name, memory_budget):
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in iter_pages(pdf.pages[index] for index in page_indices):
+                try:
+                    layouts.append(layout_page(page, triage))
+                except Exception as e:
+                    layouts.append(e)
+    return layouts, recorded.to_dict()
+
+def iter_page_layouts(pdf_pages, jobs=1, triage=True, skipped=None, memory_budget=None, cache=None):
+    """Yield the column layout of every page in order, computing them in `jobs` processes when possible.
+
+    Pages skipped by triage are not yielded; their numbers are added to skipped by reason.
+    With a cache, pages whose content was laid out before are replayed from it.
+    """
+    skipped = {} if skipped is None else skipped
+    if cache:
+        results = iter_cached_page_results(pdf_pages, cache, jobs, triage, memory_budget)
+    else:
+        results = iter_page_results(pdf_pages, jobs, triage, memory_budget)
+    for page_number, layout in results:
+        if isinstance(layout, str):
+            skipped.setdefault(layout, []).append(page_number)
+            metrics.count("faq_pages_skipped")
+            continue
+        yield layout
 
-def extract_faq_data(pdf_pages):
-    """Extract FAQ data from a PDF with two-column layout."""
+def iter_page_results(pdf_pages, jobs=1, triage=True, memory_budget=None):
+    """Yield (page number, layout or triage skip reason) for every page in order."""
+    pdf_path = pdf_pages[0].pdf.path if pdf_pages else None
+    if jobs <= 1 or len(pdf_pages) < 2 or pdf_path is None:
+        results = ((page.page_number, layout_page(page, triage)) for page in iter_pages(pdf_pages))
+    else:
+        results = iter_parallel_page_layouts(pdf_path, [page.page_number - 1 for page in pdf_pages], jobs, triage, memory_budget)
+    for page_number, layout in results:
+        if isinstance(layout, Exception):
+            raise layout
+        yield page_number, layout
+
+def iter_cached_page_results(pdf_pages, cache, jobs=1, triage=True, memory_budget=None):
+    """Like iter_page_results, but only pages missing from the cache are laid out.
+
+    Pages are cached under the hash of their content streams, resources and page boxes,
+    so an updated PDF only lays out the pages that changed.
+    """
+    hasher = PageHasher()
+    with metrics.stage("faq_page_hash", pages=len(pdf_pages)):
+        hashes = [hasher.page_hash(page) for page in pdf_pages]
+    cached = {}
+    for page, page_hash in zip(pdf_pages, hashes):
+        entry = cache.get("faq_page", page_hash)
+        # Skip reasons are only valid when triage is on
+        if entry is not None and (triage or "layout" in entry):
+            cached[page.page_number] = tuple(entry["layout"]) if "layout" in entry else entry["skipped"]
+    metrics.count("faq_pages_cached", len(cached))
+
+    pending = [page for page in pdf_pages if page.page_number not in cached]
+    laid_out = iter_page_results(pending, jobs, triage, memory_budget)
+    for page, page_hash in zip(pdf_pages, hashes):
+        if page.page_number in cached:
+            yield page.page_number, cached[page.page_number]
+            continue
+        page_number, layout = next(laid_out)
+        cache.put("faq_page", page_hash, {"skipped": layout} if isinstance(layout, str) else {"layout": layout}, evict=False)
+        yield page_number, layout
+    cache.evict()
+
+def iter_parallel_page_layouts(pdf_path, page_indices, jobs, triage=True, memory_budget=None):
+    # Contiguous chunks keep each worker's pdfplumber caches local to its pages
+    chunk_size = max(1, len(page_indices) // (jobs * 4))
+    chunks = [page_indices[i:i + chunk_size] for i in range(0, len(page_indices), chunk_size)]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(chunks))) as pool:
+        results = pool.map(layout_faq_pages, [pdf_path] * len(chunks), chunks, [triage] * len(chunks), [memory_budget] * len(chunks))
+        for chunk, (layouts, recorded) in zip(chunks, results):
+            metrics.merge(recorded)
+            for index, layout in zip(chunk, layouts):
+                yield index + 1, layout
+
+def extract_faq_data(pdf_pages, jobs=1, triage=True, memory_budget=None, cache=None):
+    """Extract FAQ data from a PDF with two-column layout.
+
+    Page layout (the expensive pdfplumber work) can run in `jobs` worker processes; the
+    section/rule/question state machine always consumes the pages in order. With triage,
+    pages without Q:/A: text are skipped before layout. Pages are released as soon as they
+    are laid out; with a memory_budget (MB) the peak memory used is recorded. With a cache
+    (an ExtractionCache), the layouts of unchanged pages are reused.
+    """
     extractor = FAQExtractor()
+    skipped = {}
+    pdf_path = pdf_pages[0].pdf.path if pdf_pages else None
 
-    try:
-        for page in pdf_pages:
-            extractor.process_page(page)
-    except Exception as e:
-        print(f"Unexpected error during extraction: {e}")
-    finally:
-        # Ensure finalize is always called
-        extractor.finalize()
+    with metrics.track_memory(os.path.basename(pdf_path) if pdf_path else "FAQ", memory_budget):
+        try:
+            for left_lines, right_lines, outside_lines in iter_page_layouts(pdf_pages, jobs, triage, skipped, memory_budget, cache):
+                extractor.process_page_lines(left_lines, right_lines, outside_lines)
+        except Exception as e:
+            print(f"Unexpected error during extraction: {e}")
+            metrics.anomaly("faq_extraction_error", str(e))
+        finally:
+            # Ensure finalize is always called
+            extractor.finalize()
 
     sections = extractor.get_sections()
+    print(f"Triage skipped {skip_summary(skipped)}")
     print(f"Extracted {len(sections)} sections from FAQ.")
     return sections
@@ -0,0 +1,89 @@
+import re
+
+class KeywordMatcher:
+    """Case-insensitive keyword vocabulary compiled once for parsing many regiment options.
+
+    Keywords keep their order (finalize sorts them longest first). An Aho-Corasick automaton
+    over the lowercased keywords finds every keyword that occurs in a text in one pass, so
+    consume() only visits keywords that are actually present instead of the whole list.
+    """
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        self.lowered = [kw.lower() for kw in self.keywords]
+        self.exact = set(self.lowered)
+        self.patterns = {}  # removal regexes, compiled on first use
+        self.always = [i for i, kw in enumerate(self.lowered) if not kw]  # "" occurs in every text
+
+        # Trie of the lowercased keywords: goto transitions, failure links and the keyword
+        # indices that end at each node (including those reached through failure links)
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for index, kw in enumerate(self.lowered):
+            node = 0
+            for char in kw:
+                if char not in self.goto[node]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[node][char] = len(self.goto) - 1
+                node = self.goto[node][char]
+            if kw:
+                self.out[node].append(index)
+
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def find(self, text):
+        """Indices of the keywords that occur in text (case-insensitive), in keyword order."""
+        found = set(self.always)
+        node = 0
+        for char in text.lower():
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            found.update(self.out[node])
+        return sorted(found)
+
+    def is_keyword(self, text):
+        return text.lower() in self.exact
+
+    def remove(self, text, kw):
+        """Remove every case-insensitive occurrence of kw from text."""
+        pattern = self.patterns.get(kw)
+        if pattern is None:
+            pattern = self.patterns[kw] = re.compile(re.escape(kw), re.IGNORECASE)
+        return pattern.sub("", text)
+
+    def consume(self, text):
+        """Remove the keywords (and "non-" keywords) found in text, in keyword order.
+
+        Returns the remaining text and the keywords and non-keywords that were removed.
+        Removing a keyword can join text into a new match, so the text is rescanned after
+        every removal.
+        """
+        keywords = []
+        non_keywords = []
+        candidates = self.find(text)
+        while candidates:
+            index = candidates.pop(0)
+            kw, lowered = self.keywords[index], self.lowered[index]
+            changed = False
+            if f"non-{lowered}" in text.lower():
+                text = self.remove(text, f"non-{kw}").strip()
+                non_keywords.append(kw)
+                changed = True
+            if lowered in text.lower():
+                text = self.remove(text, kw).strip()
+                keywords.append(kw)
+                changed = True
+            if changed:
+                candidates = [i for i in self.find(text) if i > index]
+        return text, keywords, non_keywords
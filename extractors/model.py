@@ -0,0 +1,21 @@
+class Model:
+    """Base of the extracted data classes (profiles, regiment options, regiments of renown).
+
+    FIELDS are the keys of the object's JSON form, each stored in the attribute of the same
+    name. Objects are not converted to dicts up front: the JSON encoder calls to_dict on
+    each object as it writes it (see output_writer.json_encoder), and overlays and shards
+    read fields with the same item["name"] / item.get("points") access they use on dicts.
+    """
+    __slots__ = ()
+    FIELDS = ()
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
@@ -0,0 +1,86 @@
+"""Rules that turn the notes of a unit's battle profile into profile fields.
+
+A note is matched by prefix. When several prefixes match, the longest is tried first and
+shorter ones are the fallback when its pattern does not match. Notes that contain one of
+the SUBSTRING_RULES texts are handled as well. New wording in a battle profiles update is
+a new entry in NOTE_RULES.
+"""
+import re
+import sys
+
+class NoteRule:
+    """Notes starting with prefix. apply(profile, note) sets the profile fields and returns
+    whether the note was understood."""
+    def __init__(self, prefix, apply):
+        self.prefix = prefix
+        self.apply = apply
+
+def pattern_field(pattern, field):
+    """Set field to the first group of pattern (searched in the note), if it matches."""
+    pattern = re.compile(pattern)
+    def apply(profile, note):
+        match = pattern.search(note)
+        if match:
+            setattr(profile, field, match.group(1).strip())
+        return bool(match)
+    return apply
+
+SUBHERO_PATTERN = re.compile(r"This Hero can join an eligible regiment as(?: (?:a|an))? ")
+
+def subhero_category(profile, note):
+    parts = SUBHERO_PATTERN.split(note)
+    if len(parts) > 1:
+        profile.subhero_categories.append(sys.intern(parts[1].strip()))
+    return len(parts) > 1
+
+def exact(text, apply):
+    """Only handle the note when it is exactly text."""
+    return lambda profile, note: note == text and apply(profile, note)
+
+def reinforceable(value):
+    def apply(profile, note):
+        profile.reinforceable = value
+        return True
+    return apply
+
+def handled(profile, note):
+    return True
+
+NOTE_RULES = [
+    NoteRule("This Hero can join an eligible regiment as", subhero_category),
+    # This is handled by the regiment options of the leader that can take this unit
+    NoteRule("This Hero can join", handled),
+    NoteRule("This unit cannot be reinforced", exact("This unit cannot be reinforced", reinforceable(False))),
+    NoteRule("This unit can be reinforced", reinforceable(True)),
+    # required leader note: This unit can only be taken in Callis and Toll's regiment
+    NoteRule("This unit can only be taken in", pattern_field(r"This unit can only be taken in (.+?)(?:'s)? regiment", "requiredLeader")),
+    # undersize unit condition:  You can include 1 unit of this type for each LordCelestant on Dracoth in your army
+    # we want Lord Celestant on Dracoth
+    NoteRule("You can include 1 unit of this type for each", pattern_field(r"You can include 1 unit of this type for each (.+?) in your army", "undersizeCondition")),
+    NoteRule("This unit will move to Warhammer Legends on", pattern_field(r"This unit will move to Warhammer Legends on (.+)", "retiringOn")),
+    # exclusive with condition: You cannot include this unit and Cado Ezechiar, the Hollow King in the same army
+    NoteRule("You cannot include this unit and ", pattern_field(r"You cannot include this unit and (.+?) in the same army", "exclusiveWith")),
+]
+
+class SubstringRule:
+    """Notes containing text, for units whose name contains name."""
+    def __init__(self, text, name):
+        self.text = text
+        self.name = name
+
+SUBSTRING_RULES = [
+    SubstringRule("This unit is legal for Matched Play for battles fought using the General's Handbook 2025-26 battlepack", "Scourge of Ghyran"),
+]
+
+# Prefix rules are looked up by the first KEY_LENGTH characters of a note
+KEY_LENGTH = min(len(rule.prefix) for rule in NOTE_RULES)
+RULES_BY_KEY = {}
+for rule in sorted(NOTE_RULES, key=lambda rule: -len(rule.prefix)):
+    RULES_BY_KEY.setdefault(rule.prefix[:KEY_LENGTH], []).append(rule)
+
+def apply_note_rules(profile, note):
+    """Apply the first matching rule to the profile. Returns whether the note was handled."""
+    for rule in RULES_BY_KEY.get(note[:KEY_LENGTH], []):
+        if note.startswith(rule.prefix) and rule.apply(profile, note):
+            return True
+    return any(rule.text in note and rule.name in profile.name for rule in SUBSTRING_RULES)
@@ -0,0 +1,37 @@
+from bisect import bisect_left, bisect_right
+
+class HorizontalLineIndex:
+    """Horizontal lines of a page sorted by y, for finding the lines that cross a box.
+
+    Lines count as horizontal when their ends differ by at most 1pt in y, and a line crosses a
+    box when it overlaps it in x and its y0 lies within the box's y0..y1 (PDF coordinates).
+    """
+    def __init__(self, lines):
+        horizontal = sorted(
+            (line["y0"], line["x0"], line["x1"]) for line in lines if abs(line["y0"] - line["y1"]) <= 1
+        )
+        self.ys = [y for y, _, _ in horizontal]
+        self.spans = [(x0, x1) for _, x0, x1 in horizontal]
+
+    def crosses(self, x0, y0, x1, y1):
+        for i in range(bisect_left(self.ys, y0), bisect_right(self.ys, y1)):
+            lx0, lx1 = self.spans[i]
+            if lx0 <= x1 and lx1 >= x0:
+                return True
+        return False
+
+class BoxIndex:
+    """Boxes (x0, top, x1, bottom) grown by margin and sorted by top, for containment tests."""
+    def __init__(self, bboxes, margin=0):
+        boxes = sorted((top - margin, x0 - margin, x1 + margin, bottom + margin) for x0, top, x1, bottom in bboxes)
+        self.tops = [box[0] for box in boxes]
+        self.boxes = boxes
+
+    def contains(self, x0, top, x1, bottom):
+        """Whether any box fully contains the given box."""
+        # Only boxes starting above the given box can contain it
+        for i in range(bisect_right(self.tops, top)):
+            _, bx0, bx1, bbottom = self.boxes[i]
+            if x0 >= bx0 and x1 <= bx1 and bottom <= bbottom:
+                return True
+        return False
@@ -0,0 +1,64 @@
+import hashlib
+from pdfminer.pdftypes import PDFObjRef, PDFStream
+from pdfminer.psparser import PSLiteral, PSKeyword
+
+class PageHasher:
+    """Content hashes of single pages, from their content streams, resources and page boxes.
+
+    Two pages with the same hash lay out the same, even across PDF files, as object numbers
+    are not part of the hash (streams are hashed encoded, so an encrypted PDF's pages only
+    match within the same file). Objects shared between pages (fonts, images, form XObjects)
+    are hashed once per hasher, so use one hasher per document.
+    """
+    def __init__(self):
+        self.digests = {}  # object number (or id of a direct stream) to digest
+        self.active = set()  # referenced objects being hashed, to stop at reference cycles
+
+    def page_hash(self, page):
+        page_obj = page.page_obj
+        h = hashlib.sha256()
+        h.update(repr((page_obj.mediabox, page_obj.cropbox, page_obj.rotate)).encode())
+        for stream in page_obj.contents:
+            h.update(self.digest(stream))
+        h.update(self.digest(page_obj.resources))
+        return h.hexdigest()
+
+    def digest(self, obj):
+        if isinstance(obj, PDFObjRef):
+            key = obj.objid
+            if key in self.active:
+                return b"cycle"
+            if key not in self.digests:
+                self.active.add(key)
+                try:
+                    self.digests[key] = self.digest(obj.resolve())
+                finally:
+                    self.active.discard(key)
+            return self.digests[key]
+        if isinstance(obj, PDFStream):
+            key = ("stream", id(obj))
+            if key not in self.digests:
+                # The encoded bytes, so hashing never decodes a stream: pdfminer keeps decoded
+                # data for as long as the document is open, which would pin every page's images
+                # and fonts in memory. A stream that was already decoded only has its data left.
+                data = obj.rawdata if obj.rawdata is not None else obj.data
+                self.digests[key] = hashlib.sha256(b"stream" + self.digest(obj.attrs) + (data or b"")).digest()
+            return self.digests[key]
+
+        h = hashlib.sha256()
+        if isinstance(obj, dict):
+            h.update(b"dict")
+            for name in sorted(obj, key=str):
+                h.update(repr(str(name)).encode())
+                h.update(self.digest(obj[name]))
+        elif isinstance(obj, (list, tuple)):
+            h.update(b"list")
+            for item in obj:
+                h.update(self.digest(item))
+        elif isinstance(obj, PSLiteral):
+            h.update(b"/" + repr(obj.name).encode())
+        elif isinstance(obj, PSKeyword):
+            h.update(b"keyword" + repr(obj.name).encode())
+        else:
+            h.update(repr(obj).encode())
+        return h.digest()
@@ -0,0 +1,20 @@
+import gc
+
+# Pages processed between forced garbage collections
+COLLECT_EVERY = 8
+
+def iter_pages(pages):
+    """Yield pages in order, releasing each page's parsed layout once the consumer moves on.
+
+    pdfplumber keeps the layout objects of every page it has parsed until the PDF is closed,
+    so without this memory grows with the page count. The released objects form reference
+    cycles, so a collection is forced every few pages instead of letting them pile up until
+    the next full GC.
+    """
+    for count, page in enumerate(pages, 1):
+        try:
+            yield page
+        finally:
+            page.close()
+            if count % COLLECT_EVERY == 0:
+                gc.collect()
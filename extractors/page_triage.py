@@ -0,0 +1,46 @@
+"""Cheap page checks that decide whether a page is worth running an extractor on.
+
+Each check returns None for a candidate page, or the reason the page can be skipped. The
+checks only look at objects pdfplumber has already parsed (ruling lines and the raw char
+stream), never at layout, and err on the side of keeping a page.
+"""
+
+# Table headers or page titles without which a battle profiles page yields nothing:
+# every known table type has a POINTS, UNIT SUMMARY or LEGENDS header, and regiments of
+# renown are recognised by the page title.
+BP_TOKENS = ["POINTS", "UNITSUMMARY", "LEGENDS", "REGIMENTSOFRENOWN"]
+
+SKIP_NO_RULING_LINES = "no ruling lines"
+SKIP_NO_TABLE_HEADERS = "no table headers"
+SKIP_NO_TEXT = "no text"
+SKIP_NO_QUESTIONS = "no Q:/A: pairs"
+
+def char_stream(page, keep_spaces=True):
+    """Text of the page's chars in content stream order."""
+    if keep_spaces:
+        return "".join(char["text"] for char in page.chars)
+    return "".join(char["text"] for char in page.chars if not char["text"].isspace())
+
+def triage_bp_page(page):
+    # Tables are found from ruling lines only, so a page without any has no tables
+    if not (page.lines or page.rects or page.curves):
+        return SKIP_NO_RULING_LINES
+    text = char_stream(page, keep_spaces=False)
+    if not any(token in text for token in BP_TOKENS):
+        return SKIP_NO_TABLE_HEADERS
+    return None
+
+def triage_faq_page(page):
+    text = char_stream(page)
+    if not text:
+        return SKIP_NO_TEXT
+    # The columns of a FAQ page hold "Q:" and "A:" words, so both appear in the char stream
+    if "Q:" not in text or "A:" not in text:
+        return SKIP_NO_QUESTIONS
+    return None
+
+def skip_summary(skipped):
+    """Describe {reason: [page numbers]} as e.g. "3 pages (2 no text, 1 no Q:/A: pairs)"."""
+    total = sum(len(pages) for pages in skipped.values())
+    reasons = ", ".join(f"{len(pages)} {reason}" for reason, pages in sorted(skipped.items()))
+    return f"{total} pages ({reasons})" if total else "0 pages"
@@ -1,8 +1,13 @@
 
 from extractors.utils import normalize_text, extract_points
+from extractors.model import Model
 import re
+import sys
+
+class RegimentOfRenown(Model):
+    __slots__ = ("name", "units", "points", "allowedArmies")
+    FIELDS = __slots__
 
-class RegimentOfRenown():
     def __init__(self, row):
         self.name = normalize_text(row[0].replace('\n', ' ').strip())
         unitSummaryLines = row[1].replace('\n', ' ').strip().split("•")
@@ -33,12 +38,4 @@ class RegimentOfRenown():
         for part in parts:
             part = part.strip()
             if part:
-                self.allowedArmies.append(part)
-
-    def to_dict(self):
-        return {
-            "name": self.name,
-            "units": self.units,
-            "points": self.points,
-            "allowedArmies": self.allowedArmies
-        }
\ No newline at end of file
+                self.allowedArmies.append(sys.intern(part))
\ No newline at end of file
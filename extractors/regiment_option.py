@@ -1,8 +1,54 @@
 from extractors.utils import normalize_text
+from extractors.keyword_matcher import KeywordMatcher
+from extractors.model import Model
 import re
-
-class RegimentOption:
-    def __init__(self, line, keywords=[], unit_names=[], titled_units={}, subhero_categories=[]):
+import sys
+import logging
+import metrics
+
+logger = logging.getLogger(__name__)
+
+class RegimentVocabulary:
+    """Keywords, unit names, titled units and subhero categories of a run, indexed by lowercase name.
+
+    Built once per finalize and shared by every regiment option. Parsed options are memoized
+    per normalized line, as the same options ("Any Moonclan", "0-1 Troggoth") appear on many
+    profiles.
+    """
+    def __init__(self, keywords=[], unit_names=[], titled_units={}, subhero_categories=[]):
+        # keywords can be a KeywordMatcher shared between vocabularies, or a list of keywords
+        self.keywords = keywords if isinstance(keywords, KeywordMatcher) else KeywordMatcher(keywords)
+        self.unit_names = {name.lower() for name in unit_names}
+        # short name to full name; the first key wins when two only differ in case
+        self.titled_units = {}
+        # lowercase full name to the lowercase short names that refer to it
+        self.titles = {}
+        for title_name, full_name in titled_units.items():
+            self.titled_units.setdefault(title_name.lower(), full_name)
+            self.titles.setdefault(full_name.lower(), []).append(title_name.lower())
+        self.subhero_categories = {cat.lower() for cat in subhero_categories}
+        self.plural_subhero_categories = {cat.lower() + "s" for cat in subhero_categories}
+        self.options = {}
+
+    def parse(self, line):
+        """Parse a regiment option line, reusing the result for lines that normalize the same.
+
+        The returned option is shared, so it must not be modified.
+        """
+        key = normalize_text(line.replace('\n', ' ').strip())
+        option = self.options.get(key)
+        if option is None:
+            option = self.options[key] = RegimentOption(line, vocabulary=self)
+        return option
+
+class RegimentOption(Model):
+    __slots__ = ("line", "min", "max", "keywords", "nonKeywords", "subhero_categories", "unit_names")
+    FIELDS = ("min", "max", "keywords", "nonKeywords", "subhero_categories", "unit_names")
+
+    def __init__(self, line, keywords=[], unit_names=[], titled_units={}, subhero_categories=[], vocabulary=None):
+        if vocabulary is None:
+            vocabulary = RegimentVocabulary(keywords, unit_names, titled_units, subhero_categories)
+        matcher = vocabulary.keywords
         line = normalize_text(line.replace('\n', ' ').strip())
         self.line = line
         self.min = 0
@@ -40,12 +86,12 @@ class RegimentOption:
         for part in parts:
             part = part.strip()
             # check subhero categories
-            if any(cat.lower() == part.lower() for cat in subhero_categories):
-                self.subhero_categories.append(part)
+            if part.lower() in vocabulary.subhero_categories:
+                self.subhero_categories.append(sys.intern(part))
             # allow plural forms for subhero categories
-            elif any(cat.lower() + "s" == part.lower() for cat in subhero_categories):
+            elif part.lower() in vocabulary.plural_subhero_categories:
                 # part without s
-                self.subhero_categories.append(part[:-1] if part.endswith("s") else part)
+                self.subhero_categories.append(sys.intern(part[:-1] if part.endswith("s") else part))
 
 
             # check if we consume the whole keyword
@@ -54,29 +100,17 @@ class RegimentOption:
             # check lower
             if part.startswith("non-"):
                 k = part[4:].strip()
-                if any(k.lower() == kw.lower() for kw in keywords):
+                if matcher.is_keyword(k):
                     self.nonKeywords.append(k)
 
             testPart = part
             # try whole keyword match
-            if any(kw.lower() == testPart.lower() for kw in keywords):
+            if matcher.is_keyword(testPart):
                 self.keywords.append(testPart)
                 testPart = ""
             else:
-                # Check if any keyword exists in the full part (case-insensitive)
-                nonKeywordsToAdd = []
-                keywordsToAdd = []
-                for kw in keywords:
-                    if f'non-{kw.lower()}' in testPart.lower():
-                        # Remove the keyword from the part (case-insensitive)
-                        pattern = re.compile(re.escape(f'non-{kw}'), re.IGNORECASE)
-                        testPart = pattern.sub("", testPart).strip()
-                        nonKeywordsToAdd.append(kw)
-                    if kw.lower() in testPart.lower():
-                        # Remove the keyword from the part (case-insensitive)
-                        pattern = re.compile(re.escape(kw), re.IGNORECASE)
-                        testPart = pattern.sub("", testPart).strip()
-                        keywordsToAdd.append(kw)
+                # Remove every keyword (and non-keyword) found in the part (case-insensitive)
+                testPart, keywordsToAdd, nonKeywordsToAdd = matcher.consume(testPart)
 
                 if testPart == "":
                     # If the test part is empty, it means all keywords were consumed
@@ -85,15 +119,11 @@ class RegimentOption:
 
             if testPart != "":
                 # check unit names
-                if any(name.lower() == part.lower() for name in unit_names):
-                    self.unit_names.append(part)
-                elif any(name.lower() == part.lower() for name in titled_units):
-                    # Find the matching titled unit key and get its full name
-                    for key in titled_units:
-                        if key.lower() == part.lower():
-                            full_name = titled_units[key]
-                            self.unit_names.append(full_name)
-                            break
+                if part.lower() in vocabulary.unit_names:
+                    self.unit_names.append(sys.intern(part))
+                elif part.lower() in vocabulary.titled_units:
+                    # Use the full name of the titled unit
+                    self.unit_names.append(vocabulary.titled_units[part.lower()])
 
         # test if we consumed everything
         # print(f"Testing line: {line}")
@@ -108,12 +138,12 @@ class RegimentOption:
             testLine = testLine.replace(cat.lower(), "").strip()
         for name in self.unit_names:
             testLine = testLine.replace(name.lower(), "").strip()
-            for title_name, full_name in titled_units.items():
-                if name.lower() == full_name.lower():
-                    testLine = testLine.replace(title_name.lower(), "").strip()
+            for title_name in vocabulary.titles.get(name.lower(), []):
+                testLine = testLine.replace(title_name, "").strip()
 
         if testLine != "":
-            print(f"Warning: Unparsed part in regiment option '{line}': '{testLine}'")
+            logger.warning(f"Unparsed part in regiment option '{line}': '{testLine}'")
+            metrics.anomaly("unparsed_regiment_option", f"{line}: {testLine}")
 
     def valid(self):
         return self.line == "None" or ((self.max == -1 or self.max > 0) and (self.keywords or self.nonKeywords or self.subhero_categories or self.unit_names))
@@ -122,10 +152,11 @@ class RegimentOption:
         return {
             "min": self.min,
             "max": self.max,
-            "keywords": self.keywords,
-            "nonKeywords": self.nonKeywords,
-            "subhero_categories": self.subhero_categories,
-            "unit_names": self.unit_names
+            # copies, as memoized options are shared between profiles
+            "keywords": list(self.keywords),
+            "nonKeywords": list(self.nonKeywords),
+            "subhero_categories": list(self.subhero_categories),
+            "unit_names": list(self.unit_names)
         }
 
     
@@ -1,34 +1,40 @@
 import unicodedata
+import functools
 import re
 
+# Replace common problematic unicode characters
+REPLACEMENTS = str.maketrans({
+    "\ufffd": ".",
+    "“": '"',
+    "”": '"',
+    "‘": "'",
+    "’": "'",
+    "✹": "",
+    "á": "a",
+    # emdash to dash
+    "—": "-",
+    "‑": "-",
+    "…": "...",
+    "\u00d7": "x",
+})
+
+# capture x (+|- y) we always want x
+POINTS_PATTERN = re.compile(r"[-+]?\d+")
+
+@functools.lru_cache(maxsize=8192)
 def normalize_text(text):
+    """Replace tags and problematic characters, then drop anything that is not ASCII.
+
+    Table cells repeat a lot (keywords, points, notes), so results are memoized.
+    """
     # replace tags
     text = text.replace("NEW", "")
     text = text.replace("UPDATED", "")
+    # NFKD leaves ASCII unchanged, so only other text has to go through the translation
+    if text.isascii():
+        return text.strip()
 
-    # Replace common problematic unicode characters
-    replacements = {
-        "\ufffd": ".",
-        "“": '"',
-        "”": '"',
-        "‘": "'",
-        "’": "'",
-        "-": "-",
-        "✹": "",
-        "á": "a",
-    # emdash to dash
-        "—": "-",
-        "‑": "-",
-        "-": "-",
-        "…": "...",
-        "\u00d7": "x",
-        "\u2739": "",
-        "’": "'",
-        "‑": "-",
-    }
-    ntext = text
-    for k, v in replacements.items():
-        ntext = ntext.replace(k, v)
+    ntext = text.translate(REPLACEMENTS)
     # Normalize to NFKD and encode to ASCII, ignoring errors
     # Instead of "ignore", you can use "replace" to show a replacement character (usually '?')
     ntext = unicodedata.normalize("NFKD", ntext).encode("ascii", "ignore").decode("ascii")
@@ -36,11 +42,21 @@ def normalize_text(text):
     #     print(f"Warning: Some characters were replaced with '?' in: {text}")
     return ntext.strip()
 
+def normalize_table(table):
+    """Normalize every cell of a table, joining the lines of multi-line cells. Empty cells are kept as is."""
+    return [[normalize_text(cell.replace('\n', ' ').strip()) if cell else cell for cell in row] for row in table]
+
+def parse_points(text):
+    """Points of already normalized text, 0 if there are none."""
+    try:
+        match = POINTS_PATTERN.match(text)
+        return int(match.group(0)) if match else 0
+    except Exception:
+        return 0
+
 def extract_points(text):
     # Always convert to an integer, return 0 if not possible
     try:
-        # capture x (+|- y) we always want x
-        match = re.match(r"[-+]?\d+", normalize_text(text))
-        return int(match.group(0)) if match else 0
+        return parse_points(normalize_text(text))
     except Exception:
-        return 0
\ No newline at end of file
+        return 0
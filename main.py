@@ -5,7 +5,10 @@ import pdfplumber
 from extractors.faq_extractor import FAQExtractor
 from extractors.battle_profile_extractor import BPExtractor
 import json
-from downloader import download_pdfs
+import logging
+import metrics
+from downloader import download_pdfs, DEFAULT_DOWNLOAD_WORKERS
+from extractors.extraction_cache import ExtractionCache, DEFAULT_CACHE_DIR
 
 DOWNLOAD_DIR = "downloads"
 OUTPUT_DIR = "output"
@@ -14,17 +17,40 @@ def main():
     parser = argparse.ArgumentParser(description="Run the PDF downloader and extractor.")
     parser.add_argument("--pdf-dir", type=str, default=DOWNLOAD_DIR, help="Directory containing PDFs to process.")
     parser.add_argument("--output-dir", type=str, default=OUTPUT_DIR, help="Directory to save extracted JSON files.")
+    parser.add_argument("--pretty", action="store_true", help="Write indented JSON instead of minified JSON.")
+    parser.add_argument("--no-compress", action="store_true", help="Do not write precompressed .gz/.br copies of the JSON files.")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of worker processes used to parse PDFs.")
+    parser.add_argument("--cache-dir", type=str, default=DEFAULT_CACHE_DIR, help="Directory for cached per-PDF extraction results.")
+    parser.add_argument("--no-cache", action="store_true", help="Re-extract every PDF instead of using cached results.")
+    parser.add_argument("--force-download", action="store_true", help="Delete the PDF directory and download every PDF again.")
+    parser.add_argument("--download-workers", type=int, default=DEFAULT_DOWNLOAD_WORKERS, help="Maximum number of concurrent PDF downloads.")
+    parser.add_argument("--no-triage", action="store_true", help="Run the extractors on every page instead of skipping pages without tables or Q&A (bypasses the cache).")
+    parser.add_argument("--memory-budget", type=float, help="Record peak memory per PDF and warn when it goes over this many MB (slows extraction down).")
+    parser.add_argument("--log-level", type=str, default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"], help="Logging level; DEBUG includes per-table and strikethrough details.")
+    parser.add_argument("--metrics-file", type=str, help="Write per-stage timings, counts and anomalies to this JSON file.")
 
     args = parser.parse_args()
+    logging.getLogger().setLevel(args.log_level)
 
-    download_pdfs(args.pdf_dir)
+    with metrics.stage("download_pdfs"):
+        download_pdfs(args.pdf_dir, workers=args.download_workers, force=args.force_download)
 
     if not os.path.exists(args.pdf_dir):
         print(f"Error: The directory {args.pdf_dir} does not exist.")
         return
 
     print(f"Processing {args.pdf_dir}...")
-    extract_and_save(args.pdf_dir, args.output_dir)
+    # Cached results were extracted with triage, so verifying without it has to re-extract
+    cache = None if args.no_cache or args.no_triage else ExtractionCache(args.cache_dir)
+    with metrics.stage("extract_and_save"):
+        extract_and_save(args.pdf_dir, args.output_dir, cache=cache, jobs=args.jobs, pretty=args.pretty, compress=not args.no_compress, triage=not args.no_triage, memory_budget=args.memory_budget)
+
+    if args.metrics_file:
+        if cache:
+            metrics.count("cache_hits", cache.hits)
+            metrics.count("cache_misses", cache.misses)
+        metrics.current.write(args.metrics_file)
+        print(f"Wrote metrics to {args.metrics_file}")
 
 if __name__ == "__main__":
     main()
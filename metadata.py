@@ -1,42 +1,123 @@
 import os
+import json
 import hashlib
 from datetime import datetime
-import pdfplumber
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdftypes import resolve1
+from pdfminer.utils import decode_text
+from downloader import load_manifest
 
-def create_metadata(file_path):
-    # Calculate file hash
+METADATA_CACHE_FILE = ".metadata_cache.json"
+
+def file_hash(file_path):
     hash_md5 = hashlib.md5()
     with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
             hash_md5.update(chunk)
+    return hash_md5.hexdigest()
+
+def manifest_hash(file_path):
+    """Return the hash recorded by the downloader while streaming the file, if it still matches the file."""
+    entry = load_manifest(os.path.dirname(file_path)).get(os.path.basename(file_path))
+    if entry and entry.get("hash") and entry.get("size") == os.path.getsize(file_path):
+        return entry["hash"]
+    return None
+
+def read_pdf_info(file_path):
+    """Read the document info dictionary from the PDF trailer without parsing any pages."""
+    info = {}
+    with open(file_path, "rb") as f:
+        doc = PDFDocument(PDFParser(f))
+        for entry in doc.info:
+            for key, value in entry.items():
+                value = resolve1(value)
+                if isinstance(value, bytes):
+                    value = decode_text(value)
+                info[key] = value
+    return info
+
+def parse_pdf_date(date_str):
+    # PDF dates are often in the format "D:YYYYMMDDHHmmSS"
+    try:
+        # Remove leading 'D:' if present
+        if date_str.startswith("D:"):
+            date_str = date_str[2:]
+        # Parse date
+        return datetime.strptime(date_str[:8], "%Y%m%d").strftime("%Y-%m-%d")
+    except Exception:
+        return None
+
+def load_metadata_cache(directory):
+    path = os.path.join(directory, METADATA_CACHE_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
-    # Get PDF metadata
-    created_date = None
-    with pdfplumber.open(file_path) as pdf:
-        pdf_metadata = pdf.metadata
+def save_metadata_cache(directory, cache):
+    path = os.path.join(directory, METADATA_CACHE_FILE)
+    try:
+        with open(path, "w") as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+    except OSError as e:
+        print(f"Warning: could not write metadata cache {path}: {e}")
+
+def cached_entry(file_path, cache):
+    """Return the cache entry for file_path if it still matches the file's size and mtime."""
+    file_stats = os.stat(file_path)
+    entry = cache.get(os.path.basename(file_path))
+    if entry and entry.get("size") == file_stats.st_size and entry.get("mtime") == file_stats.st_mtime_ns:
+        return entry
+    entry = {"size": file_stats.st_size, "mtime": file_stats.st_mtime_ns}
+    cache[os.path.basename(file_path)] = entry
+    return entry
+
+def content_hash(file_path):
+    """Return the MD5 of a PDF, from the metadata cache or download manifest when possible."""
+    directory = os.path.dirname(file_path)
+    cache = load_metadata_cache(directory)
+    entry = cached_entry(file_path, cache)
+    if "hash" not in entry:
+        entry["hash"] = manifest_hash(file_path) or file_hash(file_path)
+        save_metadata_cache(directory, cache)
+    return entry["hash"]
+
+def create_metadata(file_path, pdf=None):
+    """Build the metadata block for a PDF.
+
+    The hash is taken from the download manifest when available, and the published date
+    from the trailer info dictionary (of the already open pdf if given).
+    Results are cached next to the PDF keyed by file name, size and mtime.
+    """
+    directory = os.path.dirname(file_path)
+    filename = os.path.basename(file_path)
+    cache = load_metadata_cache(directory)
+    cached = cached_entry(file_path, cache)
+    if "hash" not in cached or "publishedDate" not in cached:
+        # Get PDF metadata
+        created_date = None
+        pdf_metadata = pdf.metadata if pdf is not None else read_pdf_info(file_path)
         if pdf_metadata and "CreationDate" in pdf_metadata:
-            # PDF dates are often in the format "D:YYYYMMDDHHmmSS"
-            date_str = pdf_metadata["CreationDate"]
-            try:
-                # Remove leading 'D:' if present
-                if date_str.startswith("D:"):
-                    date_str = date_str[2:]
-                # Parse date
-                created_date = datetime.strptime(date_str[:8], "%Y%m%d").strftime("%Y-%m-%d")
-            except Exception:
-                created_date = None
-
-    # Fallback to file system creation date if PDF metadata is missing
-    if not created_date:
-        file_stats = os.stat(file_path)
-        created_date = datetime.fromtimestamp(file_stats.st_ctime).strftime("%Y-%m-%d")
+            created_date = parse_pdf_date(pdf_metadata["CreationDate"])
+
+        # Fallback to file system creation date if PDF metadata is missing
+        if not created_date:
+            created_date = datetime.fromtimestamp(os.stat(file_path).st_ctime).strftime("%Y-%m-%d")
+
+        cached["hash"] = cached.get("hash") or manifest_hash(file_path) or file_hash(file_path)
+        cached["publishedDate"] = created_date
+        save_metadata_cache(directory, cache)
 
     # Create metadata
     metadata = {
-        "title": os.path.basename(file_path),
-        "filename": os.path.basename(file_path),
-        "hash": hash_md5.hexdigest(),
-        "publishedDate": created_date,
+        "title": filename,
+        "filename": filename,
+        "hash": cached["hash"],
+        "publishedDate": cached["publishedDate"],
         "extractedDate": datetime.now().strftime("%Y-%m-%d"),
     }
 
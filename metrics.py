@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows, only traced peaks are reported there
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Messages kept per anomaly kind; the count keeps going past this
+MAX_ANOMALY_SAMPLES = 50
+MB = 1024 * 1024
+
+class Metrics:
+    """Wall time, CPU time and counts per pipeline stage, plus counted anomalies.
+
+    Every stage run is kept as its own record (stage name plus details such as the PDF and
+    page), so the slowest PDF or page of a run can be found in the metrics file.
+
+    The CPU time of a stage on the main thread is the whole process's, so threads it waits
+    on are included, plus the CPU of worker processes whose metrics are merged while the
+    stage is open (also given on its own as child_cpu_s). Stages on other threads, such as
+    the concurrent downloads, only count their own thread.
+    """
+    def __init__(self):
+        self.stages = []
+        self.counters = {}
+        self.anomalies = {}  # kind to {"count", "samples"}
+        self.memory = []  # peak memory per document, see track_memory
+        self.open = []  # records of the main thread's stages that are still running
+        self.pid = os.getpid()
+        self.cpu_start = time.process_time()
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, **details):
+        """Time the body as a stage. The yielded dict can be given extra details or counts."""
+        record = {"stage": name, **details}
+        main = threading.current_thread() is threading.main_thread()
+        cpu_time = time.process_time if main else time.thread_time
+        wall_start, cpu_start = time.perf_counter(), cpu_time()
+        if main:
+            self.open.append(record)
+        try:
+            yield record
+        finally:
+            if main:
+                self.open.remove(record)
+            record["wall_s"] = round(time.perf_counter() - wall_start, 6)
+            record["cpu_s"] = round(cpu_time() - cpu_start + record.get("child_cpu_s", 0), 6)
+            with self.lock:
+                self.stages.append(record)
+            logger.debug(f"{name} {details} took {record['wall_s']:.3f}s")
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def anomaly(self, kind, message):
+        with self.lock:
+            entry = self.anomalies.setdefault(kind, {"count": 0, "samples": []})
+            entry["count"] += 1
+            if len(entry["samples"]) < MAX_ANOMALY_SAMPLES:
+                entry["samples"].append(message)
+
+    def merge(self, other):
+        """Add metrics recorded elsewhere (e.g. in a worker process), given as a to_dict() result."""
+        with self.lock:
+            # CPU used in this process is already in the open stages' process time
+            if other.get("pid", self.pid) != self.pid:
+                for record in self.open:
+                    record["child_cpu_s"] = round(record.get("child_cpu_s", 0) + other.get("cpu_s", 0), 6)
+            self.stages.extend(other["stages"])
+            self.memory.extend(other["memory"])
+            for name, amount in other["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+            for kind, other_entry in other["anomalies"].items():
+                entry = self.anomalies.setdefault(kind, {"count": 0, "samples": []})
+                entry["count"] += other_entry["count"]
+                entry["samples"].extend(other_entry["samples"][:MAX_ANOMALY_SAMPLES - len(entry["samples"])])
+
+    def totals(self):
+        """Sum wall and CPU time per stage name."""
+        totals = {}
+        for record in self.stages:
+            total = totals.setdefault(record["stage"], {"runs": 0, "wall_s": 0, "cpu_s": 0})
+            total["runs"] += 1
+            total["wall_s"] = round(total["wall_s"] + record["wall_s"], 6)
+            total["cpu_s"] = round(total["cpu_s"] + record["cpu_s"], 6)
+        return totals
+
+    def to_dict(self):
+        return {
+            "pid": self.pid,
+            "cpu_s": round(time.process_time() - self.cpu_start, 6),
+            "stages": self.stages,
+            "counters": self.counters,
+            "anomalies": self.anomalies,
+            "memory": self.memory,
+        }
+
+    def write(self, path):
+        with open(path, "w") as f:
+            json.dump({"totals": self.totals(), **self.to_dict()}, f, indent=2)
+
+# Metrics of the current process. Worker processes record into their own copy via isolated()
+# and hand the result back to be merged.
+current = Metrics()
+
+def stage(name, **details):
+    return current.stage(name, **details)
+
+def count(name, amount=1):
+    current.count(name, amount)
+
+def anomaly(kind, message):
+    current.anomaly(kind, message)
+
+def merge(other):
+    current.merge(other)
+
+@contextmanager
+def track_memory(document, budget_mb=None):
+    """Record the peak traced memory (and process peak RSS) while processing a document.
+
+    Only active when a budget is given, as tracing allocations slows extraction down. Going
+    over the budget is logged and counted as an anomaly.
+    """
+    if budget_mb is None:
+        yield
+        return
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    elif hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    else:
+        # reset_peak is new in Python 3.9; restarting also resets the peak, but drops the traces
+        tracemalloc.stop()
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        if started:
+            tracemalloc.stop()
+        record = {"document": document, "peak_mb": round(peak / MB, 2), "budget_mb": budget_mb}
+        if resource:
+            # ru_maxrss is in KiB on Linux; it is the high-water mark of the whole process
+            record["rss_peak_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+        with current.lock:
+            current.memory.append(record)
+        logger.info(f"{document}: peak traced memory {record['peak_mb']} MB")
+        if peak > budget_mb * MB:
+            logger.warning(f"{document} went over the memory budget: {record['peak_mb']} MB > {budget_mb} MB")
+            anomaly("memory_budget_exceeded", f"{document}: {record['peak_mb']} MB")
+
+@contextmanager
+def isolated():
+    """Record into a fresh Metrics for the duration of the block and yield it."""
+    global current
+    previous, current = current, Metrics()
+    try:
+        yield current
+    finally:
+        current = previous
+
+def reset():
+    global current
+    current = Metrics()
+    return current
@@ -0,0 +1,151 @@
+import os
+import re
+import gzip
+import json
+import hashlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, only .gz siblings are written without it
+    brotli = None
+
+FLUSH_SIZE = 64 * 1024
+SHARD_DIR = "battleprofile"
+
+def encode_object(obj):
+    """Serialize objects that are not plain JSON (the extracted model classes) through their to_dict."""
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return to_dict()
+
+def json_encoder(pretty=False):
+    # Objects are converted one at a time while streaming, so no full dict copy of the data is built
+    if pretty:
+        return json.JSONEncoder(indent=2, default=encode_object)
+    return json.JSONEncoder(separators=(",", ":"), default=encode_object)
+
+def write_json(path, obj, pretty=False, compress=True):
+    """Stream obj as JSON to path without building the whole document in memory.
+
+    By default the JSON is minified; pretty=True writes the indented form used for debugging.
+    With compress, precompressed path.gz (and path.br when brotli is installed) siblings are
+    written in the same pass. Files are replaced atomically once complete. Returns the MD5
+    of the JSON bytes.
+    """
+    targets = [path]
+    sinks = []
+    raw = open(path + ".part", "wb")
+    sinks.append(raw.write)
+    hash_md5 = hashlib.md5()
+    sinks.append(hash_md5.update)
+    gz = None
+    br = None
+    if compress:
+        targets.append(path + ".gz")
+        # mtime=0 keeps the .gz bytes stable when the JSON does not change
+        gz_file = open(path + ".gz.part", "wb")
+        gz = gzip.GzipFile(filename=os.path.basename(path), mode="wb", fileobj=gz_file, compresslevel=9, mtime=0)
+        sinks.append(gz.write)
+        if brotli:
+            targets.append(path + ".br")
+            br_file = open(path + ".br.part", "wb")
+            br = brotli.Compressor(mode=brotli.MODE_TEXT)
+            sinks.append(lambda data: br_file.write(br.process(data)))
+
+    try:
+        buffer = []
+        buffered = 0
+        for chunk in json_encoder(pretty).iterencode(obj):
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered >= FLUSH_SIZE:
+                data = "".join(buffer).encode("utf-8")
+                for sink in sinks:
+                    sink(data)
+                buffer = []
+                buffered = 0
+        data = "".join(buffer).encode("utf-8")
+        for sink in sinks:
+            sink(data)
+    finally:
+        raw.close()
+        if gz:
+            gz.close()
+            gz_file.close()
+        if br:
+            br_file.write(br.finish())
+            br_file.close()
+
+    for target in targets:
+        os.replace(target + ".part", target)
+    # Drop stale compressed siblings that were not rewritten this time
+    for suffix in (".gz", ".br"):
+        if path + suffix not in targets and os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return hash_md5.hexdigest()
+
+def slugify(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+def sort_by_points(items):
+    """Sort by points (highest first) then by name, the order the site renders tables in."""
+    return sorted(items, key=lambda item: (-(item.get("points") or 0), (item.get("name") or "").lower()))
+
+def faction_shard(faction):
+    """Split a faction into heroes, units and "other" items grouped by type, ready to render."""
+    profiles = faction.get("battle_profiles", [])
+    groups = {}
+    for item in faction.get("other", []):
+        groups.setdefault((item.get("type") or "Other").strip(), []).append(item)
+    return {
+        "name": faction["name"],
+        "heroes": [profile for profile in profiles if profile.get("hero") is True],
+        "units": [profile for profile in profiles if profile.get("hero") is not True],
+        "other": [{"type": group, "items": sort_by_points(groups[group])} for group in sorted(groups)],
+    }
+
+def write_battle_profile_shards(output_dir, data, pretty=False, compress=True):
+    """Write one JSON shard per faction plus an index.json listing them with hashes and counts.
+
+    Universal manifestations and regiments of renown go to a separate common.json shard.
+    Shards left over from factions that no longer exist are removed.
+    """
+    shard_dir = os.path.join(output_dir, SHARD_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
+    written = set()
+
+    def write_shard(filename, obj):
+        written.add(filename)
+        return write_json(os.path.join(shard_dir, filename), obj, pretty=pretty, compress=compress)
+
+    common = {
+        "universal_manifestations": sort_by_points(data.get("universal_manifestations", [])),
+        "regiments_of_renown": data.get("regiments_of_renown", []),
+    }
+    index = {
+        "type": "battleprofile-index",
+        "common": {
+            "path": f"{SHARD_DIR}/common.json",
+            "hash": write_shard("common.json", common),
+            "universal_manifestations": len(common["universal_manifestations"]),
+            "regiments_of_renown": len(common["regiments_of_renown"]),
+        },
+        "factions": [],
+    }
+    for faction in data.get("factions", []):
+        shard = faction_shard(faction)
+        filename = f"{slugify(faction['name'])}.json"
+        index["factions"].append({
+            "name": faction["name"],
+            "path": f"{SHARD_DIR}/{filename}",
+            "hash": write_shard(filename, shard),
+            "heroes": len(shard["heroes"]),
+            "units": len(shard["units"]),
+            "other": sum(len(group["items"]) for group in shard["other"]),
+        })
+    write_shard("index.json", index)
+
+    for name in os.listdir(shard_dir):
+        if name.split(".json")[0] + ".json" not in written:
+            os.remove(os.path.join(shard_dir, name))
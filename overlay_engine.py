@@ -0,0 +1,146 @@
+import os
+import json
+
+# Lists of named entries an overlay can change, at the top level of the data and per faction
+TOP_LEVEL_COLLECTIONS = ["universal_manifestations", "regiments_of_renown"]
+FACTION_COLLECTIONS = ["battle_profiles", "other"]
+
+ACTION_UPSERT = "upsert"  # override the entry with the same name, or append it if there is none
+ACTION_OVERRIDE = "override"
+ACTION_APPEND = "append"
+ACTION_DELETE = "delete"
+ACTIONS = [ACTION_UPSERT, ACTION_OVERRIDE, ACTION_APPEND, ACTION_DELETE]
+
+class NamedList:
+    """Name index over a list of entries that supports override, append and delete in O(1).
+
+    Deleted slots are left as None until compact() writes the list back.
+    """
+    def __init__(self, items):
+        self.items = items
+        self.positions = {}
+        for position, item in enumerate(items):
+            self.positions.setdefault(item["name"], position)
+        self.deleted = False
+
+    def get(self, name):
+        position = self.positions.get(name)
+        return None if position is None else self.items[position]
+
+    def set(self, name, item):
+        if name in self.positions:
+            self.items[self.positions[name]] = item
+        else:
+            self.positions[name] = len(self.items)
+            self.items.append(item)
+
+    def delete(self, name):
+        self.items[self.positions.pop(name)] = None
+        self.deleted = True
+
+    def compact(self):
+        if self.deleted:
+            self.items[:] = [item for item in self.items if item is not None]
+            self.deleted = False
+
+class OverlayEngine:
+    """Applies overlay files to extracted battle profile data.
+
+    Every entry in an overlay is matched by name and may carry an "action":
+    "upsert" (the default) overrides an existing entry or appends a new one,
+    "override" only replaces an existing entry, "append" only adds a missing one and
+    "delete" removes the entry. Factions accept the same actions; a faction that does
+    not exist yet is appended. Every change is recorded in `changes`.
+    """
+    def __init__(self, data):
+        self.data = data
+        self.changes = []
+        self.lists = {}  # (faction name or None, collection) to NamedList
+        self.factions = NamedList(data.setdefault("factions", []))
+
+    def named_list(self, faction, collection):
+        key = (faction["name"] if faction else None, collection)
+        if key not in self.lists:
+            owner = faction if faction else self.data
+            self.lists[key] = NamedList(owner.setdefault(collection, []))
+        return self.lists[key]
+
+    def record(self, source, action, collection, name, faction_name=None):
+        self.changes.append({
+            "overlay": source,
+            "action": action,
+            "faction": faction_name,
+            "collection": collection,
+            "name": name,
+        })
+
+    def apply_entries(self, source, named, entries, collection, faction_name=None):
+        for entry in entries:
+            entry = dict(entry)
+            action = entry.pop("action", ACTION_UPSERT)
+            name = entry["name"]
+            if action not in ACTIONS:
+                raise ValueError(f"Unknown overlay action '{action}' for {name} in {source}")
+            exists = named.get(name) is not None
+            if action == ACTION_DELETE:
+                if not exists:
+                    print(f"Warning: {source} deletes missing {collection} entry {name}")
+                    continue
+                named.delete(name)
+                self.record(source, ACTION_DELETE, collection, name, faction_name)
+            elif action == ACTION_OVERRIDE and not exists:
+                print(f"Warning: {source} overrides missing {collection} entry {name}")
+            elif action == ACTION_APPEND and exists:
+                print(f"Warning: {source} appends existing {collection} entry {name}")
+            else:
+                named.set(name, entry)
+                self.record(source, ACTION_OVERRIDE if exists else ACTION_APPEND, collection, name, faction_name)
+
+    def apply(self, overlay, source="overlay"):
+        for collection in TOP_LEVEL_COLLECTIONS:
+            if collection in overlay:
+                self.apply_entries(source, self.named_list(None, collection), overlay[collection], collection)
+
+        for o_faction in overlay.get("factions", []):
+            name = o_faction["name"]
+            action = o_faction.get("action", ACTION_UPSERT)
+            d_faction = self.factions.get(name)
+            if action == ACTION_DELETE:
+                if d_faction is None:
+                    print(f"Warning: {source} deletes missing faction {name}")
+                else:
+                    self.factions.delete(name)
+                    for collection in FACTION_COLLECTIONS:
+                        self.lists.pop((name, collection), None)
+                    self.record(source, ACTION_DELETE, "factions", name)
+                continue
+            if d_faction is None:
+                if action == ACTION_OVERRIDE:
+                    print(f"Warning: {source} overrides missing faction {name}")
+                    continue
+                # append new faction to data factions
+                d_faction = {key: value for key, value in o_faction.items() if key not in FACTION_COLLECTIONS and key != "action"}
+                self.factions.set(name, d_faction)
+                self.record(source, ACTION_APPEND, "factions", name)
+            for collection in FACTION_COLLECTIONS:
+                if collection in o_faction:
+                    self.apply_entries(source, self.named_list(d_faction, collection), o_faction[collection], collection, name)
+
+    def apply_dir(self, overlays_dir):
+        """Apply every *.json overlay in overlays_dir in file name order."""
+        for overlay_file in sorted(f for f in os.listdir(overlays_dir) if f.endswith(".json")):
+            with open(os.path.join(overlays_dir, overlay_file), "r") as f:
+                print("Loading overlay:", overlay_file)
+                self.apply(json.load(f), source=overlay_file)
+        self.finish()
+
+    def finish(self):
+        for named in self.lists.values():
+            named.compact()
+        self.factions.compact()
+
+    def report(self):
+        for change in self.changes:
+            target = f" in {change['faction']}" if change["faction"] else ""
+            print(f"{change['overlay']}: {change['action']} {change['collection']} entry {change['name']}{target}")
+        print(f"Applied {len(self.changes)} overlay changes.")
@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+import requests
+import downloader
+
+LISTING = [
+    {"title": "Rules Update", "id": {"file": "rules.pdf"}},
+    {"title": "Battle Profiles", "id": {"file": "bp.pdf"}},
+    {"title": "Stormcast Eternals Battle Profiles", "id": {"file": "sce.pdf"}},
+]
+
+class DownloadPdfsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.files = {"rules_update.pdf": b"rules", "faction_old_battle_profiles.pdf": b"old"}
+        for name, data in self.files.items():
+            with open(os.path.join(self.dir, name), "wb") as f:
+                f.write(data)
+        self.manifest = {name: {"url": name, "size": len(data)} for name, data in self.files.items()}
+        downloader.save_manifest(self.dir, self.manifest)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assert_untouched(self):
+        for name, data in self.files.items():
+            with open(os.path.join(self.dir, name), "rb") as f:
+                self.assertEqual(f.read(), data)
+        self.assertEqual(downloader.load_manifest(self.dir), self.manifest)
+
+    def download(self, listing, **kwargs):
+        with mock.patch.object(downloader, "get_api_pdfs", side_effect=listing):
+            downloader.download_pdfs(self.dir, **kwargs)
+
+    def test_empty_listing_keeps_files(self):
+        with self.assertRaises(RuntimeError):
+            self.download([[]])
+        self.assert_untouched()
+
+    def test_empty_listing_with_force_keeps_files(self):
+        with self.assertRaises(RuntimeError):
+            self.download([[]], force=True)
+        self.assert_untouched()
+
+    def test_incomplete_listing_keeps_files(self):
+        with self.assertRaises(RuntimeError):
+            self.download([LISTING[:1]])
+        self.assert_untouched()
+
+    def test_failing_listing_keeps_files(self):
+        with self.assertRaises(requests.HTTPError):
+            self.download(requests.HTTPError("503"))
+        self.assert_untouched()
+
+    def test_failing_download_keeps_files(self):
+        with mock.patch.object(downloader, "download_file", side_effect=requests.HTTPError("404")):
+            with self.assertRaises(requests.HTTPError):
+                self.download([LISTING])
+        self.assert_untouched()
+
+    def test_complete_listing_prunes_stale_files(self):
+        def download_file(url, filename, download_dir, session=None, api_file=None, previous=None):
+            with open(os.path.join(download_dir, filename), "wb") as f:
+                f.write(b"new")
+            return {"file": api_file, "url": url, "size": 3}
+        with mock.patch.object(downloader, "download_file", side_effect=download_file):
+            self.download([LISTING])
+        self.assertEqual(sorted(name for name in os.listdir(self.dir) if name.endswith(".pdf")),
+                         ["battle_profiles.pdf", "faction_stormcast_eternals_battle_profiles.pdf", "rules_update.pdf"])
+        with open(os.path.join(self.dir, downloader.MANIFEST_FILE)) as f:
+            self.assertEqual(len(json.load(f)["files"]), 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import threading
+import time
+import tracemalloc
+import types
+import unittest
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
+import metrics
+
+def burn(seconds):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+def burn_isolated(seconds):
+    with metrics.isolated() as recorded:
+        with metrics.stage("worker"):
+            burn(seconds)
+    return recorded.to_dict()
+
+class StageCpuTest(unittest.TestCase):
+    def setUp(self):
+        self.metrics = metrics.reset()
+
+    def tearDown(self):
+        metrics.reset()
+
+    def test_main_thread_stage_counts_threads_it_waits_on(self):
+        with metrics.stage("outer") as record:
+            thread = threading.Thread(target=burn, args=(0.2,))
+            thread.start()
+            thread.join()
+        self.assertGreaterEqual(record["cpu_s"], 0.15)
+
+    def test_worker_process_cpu_is_merged_into_open_stages(self):
+        with metrics.stage("outer") as outer:
+            with metrics.stage("inner") as inner:
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    recorded = pool.submit(burn_isolated, 0.2).result()
+                metrics.merge(recorded)
+        for record in (outer, inner):
+            self.assertGreaterEqual(record["child_cpu_s"], 0.15)
+            self.assertGreaterEqual(record["cpu_s"], record["child_cpu_s"])
+        self.assertEqual([record["stage"] for record in self.metrics.stages], ["worker", "inner", "outer"])
+
+    def test_same_process_snapshot_is_not_counted_twice(self):
+        with metrics.stage("outer") as record:
+            metrics.merge(burn_isolated(0.2))
+        self.assertNotIn("child_cpu_s", record)
+        self.assertLess(record["cpu_s"], 0.35)
+
+    def test_stages_closed_before_the_merge_are_unchanged(self):
+        with metrics.stage("before") as record:
+            pass
+        metrics.merge({**burn_isolated(0), "pid": -1, "cpu_s": 5})
+        self.assertNotIn("child_cpu_s", record)
+
+class TrackMemoryTest(unittest.TestCase):
+    def setUp(self):
+        self.metrics = metrics.reset()
+
+    def tearDown(self):
+        metrics.reset()
+
+    def track(self, size):
+        with metrics.track_memory("doc", budget_mb=1000):
+            data = bytearray(size)
+            del data
+        return self.metrics.memory[-1]["peak_mb"]
+
+    def test_peak_is_reset_when_already_tracing(self):
+        tracemalloc.start()
+        try:
+            self.track(20 * metrics.MB)
+            self.assertLess(self.track(0), 5)
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+    def test_without_reset_peak(self):
+        # Python 3.8 has no tracemalloc.reset_peak
+        old_tracemalloc = types.SimpleNamespace(**{name: getattr(tracemalloc, name) for name in
+                                                   ("start", "stop", "is_tracing", "get_traced_memory")})
+        tracemalloc.start()
+        try:
+            with mock.patch.object(metrics, "tracemalloc", old_tracemalloc):
+                self.track(20 * metrics.MB)
+                self.assertLess(self.track(0), 5)
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+if __name__ == "__main__":
+    unittest.main()
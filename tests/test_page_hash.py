@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+import pdfplumber
+from pdfminer.pdftypes import PDFObjRef, PDFStream
+from benchmarks.fixtures import write_faq_fixture
+from extractors.page_hash import PageHasher
+
+def reachable_streams(obj, seen=None):
+    """Every stream reachable from obj, following references."""
+    seen = set() if seen is None else seen
+    if isinstance(obj, PDFObjRef):
+        if obj.objid in seen:
+            return []
+        seen.add(obj.objid)
+        return reachable_streams(obj.resolve(), seen)
+    if isinstance(obj, PDFStream):
+        return [obj] + reachable_streams(obj.attrs, seen)
+    if isinstance(obj, dict):
+        return [stream for value in obj.values() for stream in reachable_streams(value, seen)]
+    if isinstance(obj, (list, tuple)):
+        return [stream for value in obj for stream in reachable_streams(value, seen)]
+    return []
+
+class PageHasherTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        write_faq_fixture(self.tmp.name)
+        self.pdf_path = os.path.join(self.tmp.name, "rules_update.pdf")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hashing_does_not_decode_streams(self):
+        with pdfplumber.open(self.pdf_path) as pdf:
+            hasher = PageHasher()
+            for page in pdf.pages:
+                hasher.page_hash(page)
+            streams = []
+            for page in pdf.pages:
+                streams += reachable_streams(page.page_obj.contents) + reachable_streams(page.page_obj.resources)
+            self.assertTrue(streams)
+            for stream in streams:
+                self.assertIsNone(stream.data)
+                self.assertIsNotNone(stream.rawdata)
+
+    def test_hash_is_stable_across_opens(self):
+        with pdfplumber.open(self.pdf_path) as pdf:
+            before = [PageHasher().page_hash(page) for page in pdf.pages]
+        with pdfplumber.open(self.pdf_path) as pdf:
+            after = [PageHasher().page_hash(page) for page in pdf.pages]
+        self.assertEqual(before, after)
+        self.assertEqual(len(set(before)), len(before))
+
+if __name__ == "__main__":
+    unittest.main()
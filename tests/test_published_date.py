@@ -0,0 +1,44 @@
+import glob
+import os
+import tempfile
+import unittest
+from datetime import datetime
+import pdfplumber
+import metrics
+from benchmarks.fixtures import write_fixtures
+from extractors.battle_profile_extractor import get_published_month_year
+
+class PublishedDateTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        write_fixtures(self.tmp.name, 1)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def published(self, name):
+        with metrics.isolated() as recorded, pdfplumber.open(os.path.join(self.tmp.name, name)) as pdf:
+            published = get_published_month_year(pdf)
+            laid_out = hasattr(pdf.pages[0], "_layout")
+        return published, laid_out, recorded.counters.get("bp_date_probe_layouts", 0)
+
+    def test_date_is_read_without_layout(self):
+        for path in glob.glob(os.path.join(self.tmp.name, "*battle_profiles.pdf")):
+            published, laid_out, layouts = self.published(os.path.basename(path))
+            self.assertIsNotNone(published, path)
+            self.assertFalse(laid_out, path)
+            self.assertEqual(layouts, 0, path)
+
+    def test_first_date_from_the_top_wins(self):
+        # The first page also says when a unit moves to Legends, further down
+        published, _, _ = self.published("faction_skaven_battle_profiles.pdf")
+        self.assertEqual(published, datetime(2025, 3, 1))
+
+    def test_no_date_falls_back_to_layout(self):
+        published, laid_out, layouts = self.published("rules_update.pdf")
+        self.assertIsNone(published)
+        self.assertTrue(laid_out)
+        self.assertEqual(layouts, 1)
+
+if __name__ == "__main__":
+    unittest.main()